@@ -1,16 +1,30 @@
 from flask import (
     Flask, render_template, send_from_directory, send_file,
-    request, redirect, url_for, session, flash, jsonify
+    request, redirect, url_for, session, flash, jsonify,
+    Response, stream_with_context
 )
 from werkzeug.utils import secure_filename
 import os
 import shutil
 import re
+import time
+import uuid
+import importlib
+import tempfile
 from io import BytesIO
 import zipfile
-from config import BLOCKED_PATHS
-import pandas as pd
+from config import (
+    BLOCKED_PATHS, PREWARM_MODULES,
+    JANITOR_INTERVAL, JANITOR_GRACE_SECONDS,
+    UPLOAD_TTL, UPLOAD_QUOTA, RESULT_TTL, RESULT_QUOTA, CUBE_TTL, CUBE_QUOTA,
+    BATCH_SPOOL_BYTES
+)
 import json
+import base64
+from utils.compression import init_compression
+from utils.fragment_cache import FragmentCache
+from utils.blob_store import BlobStore
+from utils.janitor import DataJanitor
 
 # ========================
 # 🔧 KONFIGURASI APLIKASI
@@ -28,11 +42,32 @@ BASE_DIR     = os.path.dirname(os.path.realpath(__file__))
 ROOT_FOLDER  = os.path.join(BASE_DIR, 'files')
 ROOT_UPLOADS = os.path.join(BASE_DIR, 'data', 'uploads')
 ROOT_RESULT  = os.path.join(BASE_DIR, 'data', 'results')
+ROOT_CACHE   = os.path.join(BASE_DIR, 'data', 'cache')
+ROOT_BLOBS   = os.path.join(BASE_DIR, 'data', 'blobs')
+ROOT_BOUNDARIES = os.path.join(BASE_DIR, 'data', 'boundaries')
+ROOT_CUBE    = os.path.join(ROOT_CACHE, 'index_cube')
+
+# Kompresi response, URL statis ber-hash & cache potongan daftar folder
+init_compression(app)
+listing_cache = FragmentCache(max_entries=512)
+
+# Upload ke files/ di-hash (SHA-256); isi sama diklon copy-on-write (reflink) dari blob,
+# atau di-hard link read-only jika filesystem tidak mendukung reflink
+blob_store = BlobStore(ROOT_BLOBS, ROOT_FOLDER)
 
 # Pastikan folder ada
 os.makedirs(ROOT_FOLDER, exist_ok=True)
 os.makedirs(ROOT_UPLOADS, exist_ok=True)
 os.makedirs(ROOT_RESULT, exist_ok=True)
+os.makedirs(ROOT_CACHE, exist_ok=True)
+
+# pandas & modul pemrosesan diimpor lazy di dalam route ClimPACT.
+# Set CCIS_PREWARM=1 pada server pre-fork (mis. gunicorn --preload) agar
+# modul tersebut dimuat sekali di proses master sebelum fork.
+PREWARM_ENABLED = os.environ.get('CCIS_PREWARM') == '1'
+
+# Pembersih otomatis folder kerja (set CCIS_JANITOR=0 untuk mematikan)
+JANITOR_ENABLED = os.environ.get('CCIS_JANITOR', '1') == '1'
 
 
 # ========================
@@ -57,6 +92,12 @@ def contains_blocked_path(filepath):
     parts = [part for part in filepath.split('/') if part]
     return any(part in BLOCKED_PATHS for part in parts)
 
+def is_unsafe_symlink(target_path):
+    """Symlink yang mengarah ke luar ROOT_FOLDER hanya boleh dibuka admin"""
+    if not os.path.islink(target_path):
+        return False
+    return not is_safe_path(ROOT_FOLDER, os.readlink(target_path)) and not is_admin()
+
 def get_directory_contents(folder_path, show_blocked=False):
     """Ambil isi folder, sembunyikan item sensitif jika bukan admin"""
     if not os.path.exists(folder_path):
@@ -115,6 +156,87 @@ def get_icon_class(filename):
     }
     return icons.get(ext, 'files')
 
+def prewarm_modules():
+    """Impor modul pemrosesan berat lebih awal agar request ClimPACT pertama tidak lambat."""
+    started = time.perf_counter()
+    for name in PREWARM_MODULES:
+        importlib.import_module(name)
+    app.logger.info("Prewarm %d modul selesai dalam %.2f s", len(PREWARM_MODULES), time.perf_counter() - started)
+
+def new_job_dir(root):
+    """Buat folder kerja unik per job; seluruh folder dibersihkan janitor sebagai satu unit."""
+    job_id = f"{int(time.time())}_{uuid.uuid4().hex[:8]}"
+    job_dir = os.path.join(root, job_id)
+    os.makedirs(job_dir)
+    return job_id, job_dir
+
+def resolve_temp_upload(temp_file):
+    """
+    Ubah temp_file '<job_id>/<nama file>' dari langkah preview menjadi (folder job, path file).
+    Mengembalikan None jika bentuknya tidak persis seperti yang dibuat preview, atau folder
+    job-nya bukan anak langsung ROOT_UPLOADS (folder ini nanti dihapus utuh).
+    """
+    if not re.fullmatch(r'\d+_[0-9a-f]{8}/[^/]+', temp_file or ''):
+        return None
+    job_id, filename = temp_file.split('/')
+    if secure_filename(filename) != filename:
+        return None
+    filepath = os.path.join(ROOT_UPLOADS, job_id, filename)
+    upload_dir = os.path.dirname(os.path.realpath(filepath))
+    if os.path.dirname(upload_dir) != os.path.realpath(ROOT_UPLOADS):
+        return None
+    return upload_dir, filepath
+
+_index_cube = None
+
+def get_index_cube():
+    """Kubus indeks stasiun × tahun (dibuat saat pertama dipakai agar pandas tetap lazy)."""
+    global _index_cube
+    if _index_cube is None:
+        from utils.index_cube import IndexCube
+        _index_cube = IndexCube(ROOT_CUBE)
+    return _index_cube
+
+def is_cube_key(key):
+    return bool(re.fullmatch(r'[0-9a-f]{64}', key or ''))
+
+def cube_result_id(cube_key, metadata):
+    """
+    ID hasil tetap untuk satu stasiun kubus + periode + skema kubus, agar halaman hasil tidak
+    menulis folder baru tiap dibuka dan hasil dari skema lama tidak dipakai ulang.
+    """
+    from utils.index_cube import CUBE_SCHEMA
+    return f"cube_{cube_key[:16]}_s{CUBE_SCHEMA}_{metadata['base_period_start']}_{metadata['base_period_end']}"
+
+def save_result(result_df, metadata, result_id=None):
+    """
+    Simpan hasil sekali sebagai cache CSV + metadata JSON; format lain di-stream dari cache ini.
+    Dengan `result_id` tetap, hasil yang sudah tersimpan dipakai ulang (mtime-nya disegarkan
+    agar tidak dihapus janitor) dan hanya ditulis jika belum ada.
+    """
+    result_stem = secure_filename(f"{metadata['station_name'].replace(' ', '_')}_indices")
+    result_filename = f"{result_stem}.csv"
+    if result_id is None:
+        result_id, result_dir = new_job_dir(ROOT_RESULT)
+    else:
+        result_dir = os.path.join(ROOT_RESULT, result_id)
+        result_path = os.path.join(result_dir, result_filename)
+        if os.path.isfile(result_path):
+            os.utime(result_path)
+            return result_id, result_filename
+        os.makedirs(result_dir, exist_ok=True)
+
+    # Tulis ke file sementara lalu rename: permintaan paralel untuk ID yang sama tidak saling menimpa sebagian
+    suffix = f".{uuid.uuid4().hex[:8]}.tmp"
+    json_path = os.path.join(result_dir, f"{result_stem}.json")
+    with open(json_path + suffix, 'w') as f:
+        json.dump(metadata, f)
+    os.replace(json_path + suffix, json_path)
+    csv_path = os.path.join(result_dir, result_filename)
+    result_df.to_csv(csv_path + suffix)
+    os.replace(csv_path + suffix, csv_path)
+    return result_id, result_filename
+
 # Tambahkan di bagian atas helper functions (opsional tapi disarankan)
 def sanitize_path(path):
     """Normalisasi path: hapus trailing/leading slash, ganti backslash, dan kolaps slash ganda."""
@@ -126,6 +248,63 @@ def sanitize_path(path):
     path = '/'.join(part for part in path.split('/') if part)
     return path
 
+def render_directory_listing(target_path, filepath, admin):
+    """Baca isi folder dan render potongan daftar file (hasilnya bisa di-cache)."""
+    from utils.thumbnail_cache import is_image
+
+    items, error = get_directory_contents(target_path, show_blocked=admin)
+
+    # Ukuran & jumlah file folder dihitung paralel dengan batas waktu; potongan HTML
+    # kedaluwarsa bersama statistik folder tertua yang ikut dirender. Statistik basi tetap
+    # ditampilkan (dihitung ulang di latar belakang) tetapi potongannya tidak di-cache.
+    stats_complete = True
+    expires_at = None
+    dir_items = [item for item in (items or []) if item['is_dir']]
+    if dir_items:
+        from utils.parallel_walk import folder_stats_many, FOLDER_STATS_TTL
+        stats = folder_stats_many(
+            [os.path.join(target_path, item['name']) for item in dir_items],
+            skip_names=() if admin else BLOCKED_PATHS
+        )
+        for item in dir_items:
+            result = stats[os.path.join(target_path, item['name'])]
+            if result is None:
+                stats_complete = False
+                continue
+            item['size'], item['file_count'], computed, fresh = result
+            stats_complete = stats_complete and fresh
+            expires_at = min(expires_at or float('inf'), computed + FOLDER_STATS_TTL)
+
+    icon_map = {
+        item['name']: 'folder' if item['is_dir'] else get_icon_class(item['name'])
+        for item in (items or [])
+    }
+    has_images = any(item['is_file'] and is_image(item['name']) for item in (items or []))
+    parent_path = None
+    clean_path = filepath.strip('/')
+    if clean_path:
+        parent = os.path.dirname(clean_path)
+        parent_path = parent if parent else None
+
+    file_list_html = ''
+    if items:
+        file_list_html = render_template(
+            'file_list.html',
+            items=items,
+            current_path=filepath,
+            parent_path=parent_path,
+            icon_map=icon_map
+        )
+    return {
+        'items': items,
+        'error': error,
+        'parent_path': parent_path,
+        'has_images': has_images,
+        'file_list_html': file_list_html,
+        'stats_complete': stats_complete,
+        'expires_at': expires_at
+    }
+
 # ========================
 # 🔑 AUTHENTICATION ROUTES
 # ========================
@@ -180,10 +359,12 @@ def climpact_preview():
         return redirect(url_for('climpact'))
 
     filename = secure_filename(file.filename)
-    filepath = os.path.join(ROOT_UPLOADS, filename)
+    job_id, job_dir = new_job_dir(ROOT_UPLOADS)
+    filepath = os.path.join(job_dir, filename)
     file.save(filepath)
 
     try:
+        import pandas as pd
         df = pd.read_csv(filepath, sep=';')
         required_cols = ['DATA_TIMESTAMP', 'NAME', 'CURRENT_LATITUDE', 'CURRENT_LONGITUDE', 'tmin', 'tmax', 'ch', 'YEAR']
         for col in required_cols:
@@ -235,13 +416,9 @@ def climpact_preview():
         tmin = df['tmin'].where(pd.notnull(df['tmin']), None).tolist()
         pr = df['ch'].where(pd.notnull(df['ch']), None).tolist()
 
-        temp_id = f"{os.path.splitext(filename)[0]}_{int(pd.Timestamp.now().timestamp())}"
-        temp_path = os.path.join(ROOT_UPLOADS, temp_id + '.csv')
-        os.rename(filepath, temp_path)
-
         return render_template(
             'climpact_preview.html',
-            temp_file=temp_id + '.csv',
+            temp_file=f"{job_id}/{filename}",
             station_name=station_name,
             latitude=lat,
             longitude=lon,
@@ -260,8 +437,7 @@ def climpact_preview():
 
     except Exception as e:
         flash(f"Error saat membaca file: {str(e)}", 'error')
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        shutil.rmtree(job_dir, ignore_errors=True)
         return redirect(url_for('climpact'))
 
 @app.route('/climpact/process', methods=['POST'])
@@ -271,7 +447,12 @@ def climpact_process():
         flash('File sementara tidak ditemukan.', 'error')
         return redirect(url_for('climpact'))
 
-    filepath = os.path.join(ROOT_UPLOADS, temp_file)
+    resolved = resolve_temp_upload(temp_file)
+    if resolved is None:
+        flash('File sementara tidak valid.', 'error')
+        return redirect(url_for('climpact'))
+
+    upload_dir, filepath = resolved
     if not os.path.exists(filepath):
         flash('File sementara telah kadaluarsa.', 'error')
         return redirect(url_for('climpact'))
@@ -280,28 +461,99 @@ def climpact_process():
     end_year = request.form.get('end_year', '').strip() or None
 
     try:
-        from utils.climpact_processor import process_climpact_data
-        result_df, metadata = process_climpact_data(filepath, start_year, end_year)
-
-        result_filename = f"{metadata['station_name'].replace(' ', '_')}_indices.csv"
-        result_path = os.path.join(ROOT_RESULT, result_filename)
-        result_df.to_csv(result_path)
+        # Periode penuh dihitung sekali ke kubus indeks; periode lain dipotong dari sana
+        cube_key, result_df, metadata = get_index_cube().get_or_build(filepath, start_year, end_year)
+        result_id, result_filename = save_result(result_df, metadata, cube_result_id(cube_key, metadata))
 
-        os.remove(filepath)
+        shutil.rmtree(upload_dir, ignore_errors=True)
 
         return render_template(
             'climpact_result.html',
             result_df=result_df,
             metadata=metadata,
-            result_filename=result_filename
+            result_id=result_id,
+            result_filename=result_filename,
+            cube_key=cube_key
         )
 
     except Exception as e:
         flash(f"Error saat memproses data: {str(e)}", 'error')
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        return redirect(url_for('climpact'))
+
+@app.route('/climpact/result/<cube_key>')
+def climpact_cube_result(cube_key):
+    """Hasil stasiun yang sudah ada di kubus untuk periode lain, tanpa upload & hitung ulang."""
+    if not is_cube_key(cube_key):
+        return "📁 Hasil tidak ditemukan.", 404
+    start_year = request.args.get('start_year', '').strip() or None
+    end_year = request.args.get('end_year', '').strip() or None
+    try:
+        result_df, metadata = get_index_cube().get(cube_key, start_year, end_year)
+    except ValueError as e:
+        flash(f"Error saat memproses data: {str(e)}", 'error')
         return redirect(url_for('climpact'))
 
+    result_id, result_filename = save_result(result_df, metadata, cube_result_id(cube_key, metadata))
+    return render_template(
+        'climpact_result.html',
+        result_df=result_df,
+        metadata=metadata,
+        result_id=result_id,
+        result_filename=result_filename,
+        cube_key=cube_key
+    )
+
+@app.route('/climpact/compare')
+def climpact_compare():
+    """
+    Bandingkan rata-rata indeks dua pilihan (stasiun dan/atau periode) dari kubus:
+    ?a=<key>&a_start=&a_end=&b=<key>&b_start=&b_end= (b default = stasiun a).
+    Tambahkan &format=json untuk hasil JSON, selain itu dirender sebagai halaman.
+    """
+    as_json = request.args.get('format') == 'json'
+    key_a = request.args.get('a', '')
+    key_b = request.args.get('b', '') or key_a
+    if not (is_cube_key(key_a) and is_cube_key(key_b)):
+        if as_json:
+            return jsonify({'error': 'Hasil stasiun tidak ditemukan.'}), 404
+        return "📁 Hasil tidak ditemukan.", 404
+
+    cube = get_index_cube()
+    try:
+        left, meta_a = cube.get(key_a, request.args.get('a_start') or None, request.args.get('a_end') or None)
+        right, meta_b = cube.get(key_b, request.args.get('b_start') or None, request.args.get('b_end') or None)
+    except ValueError as e:
+        if as_json:
+            return jsonify({'error': str(e)}), 400
+        flash(f"Error saat membandingkan data: {str(e)}", 'error')
+        return redirect(url_for('climpact'))
+
+    mean_a, mean_b = left.mean(), right.mean()
+    rows = []
+    for index in mean_a.index.union(mean_b.index, sort=False):
+        a, b = mean_a.get(index), mean_b.get(index)
+        rows.append({
+            'index': index,
+            'a': None if a is None or a != a else round(float(a), 3),
+            'b': None if b is None or b != b else round(float(b), 3),
+            'diff': None if a is None or b is None or a != a or b != b else round(float(b - a), 3),
+        })
+
+    def describe(meta):
+        return {k: meta[k] for k in ('station_name', 'base_period_start', 'base_period_end', 'total_years')}
+
+    if as_json:
+        return jsonify({'a': describe(meta_a), 'b': describe(meta_b), 'indices': rows})
+    return render_template(
+        'climpact_compare.html',
+        a=describe(meta_a),
+        b=describe(meta_b),
+        rows=rows,
+        key_a=key_a,
+        key_b=key_b
+    )
+
 @app.route('/climpact/generate-template')
 def generate_template():
     from io import StringIO
@@ -324,13 +576,103 @@ def generate_template():
         download_name='climpact_template.csv'
     )
 
-@app.route('/climpact/download/<filename>')
-def download_climpact_result(filename):
-    return send_from_directory(ROOT_RESULT, filename, as_attachment=True)
+@app.route('/climpact/download/<job_id>/<filename>')
+def download_climpact_result(job_id, filename):
+    return send_from_directory(os.path.join(ROOT_RESULT, secure_filename(job_id)), filename, as_attachment=True)
+
+@app.route('/climpact/export/<job_id>/<filename>')
+def export_climpact_result(job_id, filename):
+    """Stream hasil yang sudah di-cache dalam format pilihan (?format=csv|parquet|netcdf|xlsx)."""
+    from utils.result_exporter import EXPORT_FORMATS, iter_export, export_filename, export_mimetype
+
+    filename = secure_filename(filename)
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return f"❌ Format '{fmt}' tidak didukung.", 400
+
+    result_dir = os.path.join(ROOT_RESULT, secure_filename(job_id))
+    result_path = os.path.join(result_dir, filename)
+    if not filename.endswith('.csv') or not os.path.isfile(result_path):
+        return "📁 Hasil tidak ditemukan.", 404
+    if fmt == 'csv':
+        return send_from_directory(result_dir, filename, as_attachment=True)
+
+    import pandas as pd
+    stem = os.path.splitext(filename)[0]
+    metadata = None
+    metadata_path = os.path.join(result_dir, f"{stem}.json")
+    if os.path.exists(metadata_path):
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+
+    try:
+        result_df = pd.read_csv(result_path, index_col='YEAR')
+        chunks = iter_export(result_df, fmt, metadata=metadata)
+    except ValueError as e:
+        return f"❌ {str(e)}", 400
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=export_mimetype(fmt),
+        headers={'Content-Disposition': f'attachment; filename="{export_filename(stem, fmt)}"'}
+    )
+
+def records_json(df):
+    """Baris DataFrame sebagai list dict yang aman untuk jsonify (NaN menjadi null)."""
+    return json.loads(df.to_json(orient='records'))
+
+@app.route('/climpact/anomaly', methods=['POST'])
+def climpact_anomaly():
+    """Normal 1991–2020 dan anomali bulanan multi-stasiun, diurutkan untuk produk ANOMALI_SUHU_UDARA."""
+    files = [f for f in request.files.getlist('station_files') if f.filename]
+    if not files:
+        return jsonify({'error': 'Tidak ada file yang dipilih.'}), 400
+    year = request.form.get('year', '').strip()
+    month = request.form.get('month', '').strip()
+    if not year or not month:
+        return jsonify({'error': 'Tahun dan bulan wajib diisi.'}), 400
+
+    job_id, job_dir = new_job_dir(ROOT_UPLOADS)
+    try:
+        from utils.anomaly_engine import monthly_anomaly_report, BASE_PERIOD
+        paths = []
+        for i, file in enumerate(files):
+            path = os.path.join(job_dir, f"{i:04d}_{secure_filename(file.filename)}")
+            file.save(path)
+            paths.append(path)
+
+        report = monthly_anomaly_report(
+            paths,
+            year=year,
+            month=month,
+            cache_dir=os.path.join(ROOT_CACHE, 'climatology'),
+            variable=request.form.get('variable', 'tave'),
+            base_start=int(request.form.get('base_start') or BASE_PERIOD[0]),
+            base_end=int(request.form.get('base_end') or BASE_PERIOD[1]),
+            refresh=request.form.get('refresh') == '1'
+        )
+        table = report.pop('table')
+        top_n = int(request.form.get('top', 5))
+        ranked = table.dropna(subset=['anomaly'])
+        return jsonify({
+            **report,
+            'highest': records_json(ranked.head(top_n)),
+            'lowest': records_json(ranked.tail(top_n).iloc[::-1]),
+            'stations': records_json(table),
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
 
 @app.route('/climpact/batch')
 def climpact_batch():
-    return render_template('climpact_batch.html')
+    from utils.region_aggregator import list_boundary_files, AGGREGATION_METHODS
+    return render_template(
+        'climpact_batch.html',
+        boundary_files=list_boundary_files(ROOT_BOUNDARIES),
+        aggregation_methods=AGGREGATION_METHODS
+    )
 
 @app.route('/climpact/batch/process', methods=['POST'])
 def climpact_batch_process():
@@ -345,26 +687,141 @@ def climpact_batch_process():
 
     start_year = request.form.get('start_year', '').strip() or None
     end_year = request.form.get('end_year', '').strip() or None
+    export_format = request.form.get('format', '').strip().lower() or None
 
+    # ZIP hasil tidak disimpan: dibangun di file sementara (memori, pindah ke disk jika besar)
+    # lalu langsung dikirim; folder upload hanya menampung file masukan selama diproses
+    upload_dir = None
+    archive = tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_BYTES)
     try:
         from utils.batch_processor import process_batch
-        zip_path, summary_path = process_batch(
+        _, upload_dir = new_job_dir(ROOT_UPLOADS)
+        process_batch(
             files,
+            archive,
             start_year=start_year,
             end_year=end_year,
-            output_dir=ROOT_RESULT
+            work_dir=upload_dir,
+            export_format=export_format,
+            cube=get_index_cube()
+        )
+        archive.seek(0)
+        return send_file(
+            archive,
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name="batch_climpact_results.zip"
         )
-
-        final_zip = os.path.join(ROOT_RESULT, f"batch_{int(pd.Timestamp.now().timestamp())}_results.zip")
-        with zipfile.ZipFile(final_zip, 'w') as zf:
-            zf.write(zip_path, arcname="hasil_per_stasiun.zip")
-            zf.write(summary_path, arcname="summary_all_stations.csv")
-
-        return send_file(final_zip, as_attachment=True, download_name="batch_climpact_results.zip")
 
     except Exception as e:
+        archive.close()
         flash(f"Error saat memproses batch: {str(e)}", 'error')
         return redirect(url_for('climpact_batch'))
+    finally:
+        if upload_dir:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+
+@app.route('/climpact/batch/preflight', methods=['POST'])
+def climpact_batch_preflight():
+    """
+    Pemeriksaan awal file batch. Browser mengirim potongan awal/akhir tiap file
+    (station_head, station_tail, station_size); station_files utuh tetap diterima.
+    """
+    files = [f for f in request.files.getlist('station_files') if f.filename]
+    heads = request.files.getlist('station_head')
+    tails = request.files.getlist('station_tail')
+    sizes = request.form.getlist('station_size')
+    if not files and not heads:
+        return jsonify({'error': 'Tidak ada file yang dipilih.'}), 400
+    if not (len(heads) == len(tails) == len(sizes)) or not all(size.isdigit() for size in sizes):
+        return jsonify({'error': 'Potongan file tidak lengkap.'}), 400
+
+    start_year = request.form.get('start_year', '').strip() or None
+    end_year = request.form.get('end_year', '').strip() or None
+    if not all(year is None or year.isdigit() for year in (start_year, end_year)):
+        return jsonify({'error': 'Start Year dan End Year harus berupa angka.'}), 400
+
+    from utils.preflight import (
+        preflight_files, preflight_samples, PREFLIGHT_HEAD_BYTES, PREFLIGHT_TAIL_BYTES
+    )
+    started = time.perf_counter()
+    if heads:
+        samples = [
+            (os.path.basename(head.filename), int(size),
+             head.stream.read(PREFLIGHT_HEAD_BYTES), tail.stream.read(PREFLIGHT_TAIL_BYTES))
+            for head, tail, size in zip(heads, tails, sizes)
+        ]
+        reports = preflight_samples(samples, start_year=start_year, end_year=end_year)
+    else:
+        reports = preflight_files(files, start_year=start_year, end_year=end_year)
+    return jsonify({
+        'files': reports,
+        'total': len(reports),
+        'valid': sum(1 for r in reports if r['ok']),
+        'invalid': sum(1 for r in reports if not r['ok']),
+        'elapsed': round(time.perf_counter() - started, 3),
+    })
+
+
+@app.route('/climpact/regions', methods=['POST'])
+def climpact_regions():
+    """Rata-rata indeks per wilayah × tahun dari tabel hasil batch atau hasil tersimpan."""
+    from utils.region_aggregator import (
+        RegionBoundaries, AGGREGATION_METHODS, list_boundary_files,
+        aggregate_regions, load_index_table, load_stored_results
+    )
+    from utils.result_exporter import EXPORT_FORMATS, iter_export, export_filename, export_mimetype
+
+    boundary = secure_filename(request.form.get('boundary', ''))
+    method = request.form.get('method', 'mean').strip().lower()
+    fmt = request.form.get('format', 'csv').strip().lower()
+    result_ids = [secure_filename(r) for r in request.form.get('result_ids', '').split(',') if r.strip()]
+    indices_file = request.files.get('indices_file')
+
+    error = None
+    if boundary not in list_boundary_files(ROOT_BOUNDARIES):
+        error = "File batas wilayah tidak ditemukan."
+    elif method not in AGGREGATION_METHODS:
+        error = f"Metode agregasi '{method}' tidak didukung."
+    elif fmt not in EXPORT_FORMATS or fmt == 'netcdf':
+        error = f"Format '{fmt}' tidak didukung untuk rata-rata wilayah."
+    elif not result_ids and not (indices_file and indices_file.filename):
+        error = "Pilih tabel indeks hasil batch atau ID hasil tersimpan."
+    if error:
+        flash(error, 'error')
+        return redirect(url_for('climpact_batch'))
+
+    job_dir = None
+    try:
+        if result_ids:
+            long_table = load_stored_results([os.path.join(ROOT_RESULT, r) for r in result_ids])
+        else:
+            job_id, job_dir = new_job_dir(ROOT_UPLOADS)
+            table_path = os.path.join(job_dir, secure_filename(indices_file.filename))
+            indices_file.save(table_path)
+            long_table = load_index_table(table_path)
+
+        boundaries = RegionBoundaries.from_file(os.path.join(ROOT_BOUNDARIES, boundary))
+        table, assignment = aggregate_regions(long_table, boundaries, method)
+        chunks = iter_export(table.reset_index(), fmt, metadata={
+            'boundary': boundary,
+            'method': AGGREGATION_METHODS[method],
+            'stations': len(assignment['station_name'].unique()),
+            'regions': len(table.index.get_level_values('region').unique()),
+        })
+    except ValueError as e:
+        flash(f"Error saat menghitung rata-rata wilayah: {str(e)}", 'error')
+        return redirect(url_for('climpact_batch'))
+    finally:
+        if job_dir:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    stem = secure_filename(f"regional_{os.path.splitext(boundary)[0]}_{method}")
+    return Response(
+        stream_with_context(chunks),
+        mimetype=export_mimetype(fmt),
+        headers={'Content-Disposition': f'attachment; filename="{export_filename(stem, fmt)}"'}
+    )
 
 
 # ========================
@@ -380,43 +837,103 @@ def browse(filepath=""):
         return "🚫 Akses ditolak.", 403
     target_path = os.path.join(ROOT_FOLDER, filepath)
     # Tambahan: pastikan target symlink (jika ada) tetap aman
-    if os.path.islink(target_path):
-        link_target = os.readlink(target_path)
-        if not is_safe_path(ROOT_FOLDER, link_target) and not is_admin():
-            return "🚫 Symlink mengarah ke lokasi tidak aman.", 403
-        
+    if is_unsafe_symlink(target_path):
+        return "🚫 Symlink mengarah ke lokasi tidak aman.", 403
+
     if os.path.isdir(target_path):
-        items, error = get_directory_contents(target_path, show_blocked=is_admin())
-        icon_map = {
-            item['name']: 'folder' if item['is_dir'] else get_icon_class(item['name'])
-            for item in (items or [])
-        }
-        parent_path = None
-        clean_path = filepath.strip('/')
-        if clean_path:
-            parent = os.path.dirname(clean_path)
-            parent_path = parent if parent else None
+        admin = is_admin()
+        # Daftar isi folder di-cache per (path, mtime folder, admin)
+        cache_key = (filepath, os.stat(target_path).st_mtime_ns, admin)
+        listing = listing_cache.get(cache_key)
+        if listing is None:
+            listing = render_directory_listing(target_path, filepath, admin)
+            if listing['error'] is None and listing['stats_complete']:
+                listing_cache.set(cache_key, listing, expires_at=listing['expires_at'])
 
         return render_template(
             'ftp.html',
-            items=items,
             current_path=filepath,
-            parent_path=parent_path,
-            error=error,
-            icon_map=icon_map,
-            is_admin=is_admin()
+            is_admin=admin,
+            **listing
         )
 
     elif os.path.isfile(target_path):
         filename = os.path.basename(target_path)
         if filename in BLOCKED_PATHS and not is_admin():
             return "🚫 Akses ditolak.", 403
-        return send_from_directory(os.path.dirname(target_path), filename)
+        # File hasil upload: ETag = SHA-256 dari indeks (tanpa membaca ulang file)
+        digest = blob_store.lookup(target_path)
+        response = send_from_directory(
+            os.path.dirname(target_path), filename, etag=digest if digest else True
+        )
+        if digest:
+            response.headers['Repr-Digest'] = f"sha-256=:{base64.b64encode(bytes.fromhex(digest)).decode()}:"
+        return response
 
     else:
         return "📁 Tidak ditemukan.", 404
 
 
+@app.route('/thumb/<path:filepath>')
+def thumbnail(filepath):
+    """Sajikan thumbnail/preview gambar dari cache (dibuat saat pertama diminta)."""
+    filepath = sanitize_path(filepath)
+    if not is_safe_path(ROOT_FOLDER, filepath):
+        return "🚫 Akses ditolak.", 403
+    if contains_blocked_path(filepath) and not is_admin():
+        return "🚫 Akses ditolak.", 403
+
+    from utils.thumbnail_cache import get_thumbnail, is_image
+    target_path = os.path.join(ROOT_FOLDER, filepath)
+    # Sama seperti browse: symlink tidak boleh keluar dari ROOT_FOLDER
+    if is_unsafe_symlink(target_path):
+        return "🚫 Symlink mengarah ke lokasi tidak aman.", 403
+    if not os.path.isfile(target_path) or not is_image(target_path):
+        return "📁 Tidak ditemukan.", 404
+
+    size = request.args.get('size', 'thumb')
+    fmt = request.args.get('fmt', 'webp')
+    try:
+        thumb_path, mimetype = get_thumbnail(
+            target_path, os.path.join(ROOT_CACHE, 'thumbs'), size=size, fmt=fmt
+        )
+    except ValueError as e:
+        return f"❌ {str(e)}", 400
+    except Exception as e:
+        return f"❌ Gagal membuat thumbnail: {str(e)}", 500
+
+    response = send_file(thumb_path, mimetype=mimetype, conditional=True, max_age=86400)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+
+@app.route('/inspect/<path:filepath>')
+def inspect_file(filepath):
+    """Ringkasan header NetCDF/CSV (dimensi, variabel, atribut, sampel) tanpa unduh penuh."""
+    filepath = sanitize_path(filepath)
+    if not is_safe_path(ROOT_FOLDER, filepath):
+        return jsonify({'error': 'Akses ditolak.'}), 403
+    if contains_blocked_path(filepath) and not is_admin():
+        return jsonify({'error': 'Akses ditolak.'}), 403
+
+    from utils.file_inspector import inspect_file as inspect_summary, is_inspectable
+    target_path = os.path.join(ROOT_FOLDER, filepath)
+    if is_unsafe_symlink(target_path):
+        return jsonify({'error': 'Symlink mengarah ke lokasi tidak aman.'}), 403
+    if not os.path.isfile(target_path) or not is_inspectable(target_path):
+        return jsonify({'error': 'File tidak ditemukan atau tidak dapat diinspeksi.'}), 404
+
+    try:
+        rows = min(int(request.args.get('rows', 20)), 1000)
+        summary = inspect_summary(target_path, sample_rows=rows)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Gagal membaca file: {str(e)}'}), 500
+
+    return jsonify({'path': filepath, **summary})
+
+
 @app.route('/files/<path:filepath>/download-zip')
 def download_zip(filepath):
     if not is_safe_path(ROOT_FOLDER, filepath) or (contains_blocked_path(filepath) and not is_admin()):
@@ -426,17 +943,12 @@ def download_zip(filepath):
     if not os.path.isdir(target_path):
         return "📁 Folder tidak ditemukan.", 404
 
+    from utils.parallel_walk import add_tree_to_zip
+    skip_names = () if is_admin() else BLOCKED_PATHS
     memory = BytesIO()
     try:
         with zipfile.ZipFile(memory, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for root, dirs, files in os.walk(target_path):
-                if not is_admin():
-                    dirs[:] = [d for d in dirs if d not in BLOCKED_PATHS]
-                    files = [f for f in files if f not in BLOCKED_PATHS]
-                for f in files:
-                    full_path = os.path.join(root, f)
-                    arcname = os.path.relpath(full_path, target_path)
-                    zf.write(full_path, arcname)
+            add_tree_to_zip(zf, target_path, target_path, skip_names)
         memory.seek(0)
         folder_name = os.path.basename(target_path.rstrip('/'))
         return send_file(
@@ -505,20 +1017,15 @@ def download_selected():
             return send_file(real_path, as_attachment=True, download_name=fname_clean)
 
     # ZIP
+    from utils.parallel_walk import add_tree_to_zip
+    skip_names = () if is_admin() else BLOCKED_PATHS
     memory = BytesIO()
     with zipfile.ZipFile(memory, 'w', zipfile.ZIP_DEFLATED) as zf:
         for fname_clean, real_path, is_dir in valid_items:
             if not is_dir:
                 zf.write(real_path, fname_clean)
             else:
-                for root, dirs, files in os.walk(real_path):
-                    if not is_admin():
-                        dirs[:] = [d for d in dirs if d not in BLOCKED_PATHS]
-                        files = [f for f in files if f not in BLOCKED_PATHS]
-                    for f in files:
-                        full = os.path.join(root, f)
-                        arcname = os.path.relpath(full, base_real)
-                        zf.write(full, arcname)
+                add_tree_to_zip(zf, real_path, base_real, skip_names)
 
     memory.seek(0)
     return send_file(
@@ -555,18 +1062,8 @@ def upload_files():
         if original_name in BLOCKED_PATHS:
             continue
 
-        # Pisahkan nama dasar dan ekstensi
-        name, ext = os.path.splitext(original_name)
-        candidate = original_name
-        counter = 1
-
-        # Cari nama yang belum ada
-        while os.path.exists(os.path.join(target_dir, candidate)):
-            candidate = f"{name}({counter}){ext}"
-            counter += 1
-
-        # Simpan dengan nama unik
-        file.save(os.path.join(target_dir, candidate))
+        # Simpan dengan nama unik (name(n).ext); isi yang sama persis tidak disalin ulang
+        blob_store.save_upload(file, target_dir, original_name)
 
     return "OK"
 
@@ -631,14 +1128,65 @@ def delete_items():
                 os.remove(full_path)
             elif os.path.isdir(full_path):
                 shutil.rmtree(full_path)
+            blob_store.forget(full_path)
         except Exception as e:
             return f"❌ Gagal menghapus '{name}': {str(e)}", 500
     return "OK"
 
 
+# ========================
+# 🧹 PEMBERSIH FOLDER KERJA
+# ========================
+
+janitor = DataJanitor(
+    {
+        'uploads': {'path': ROOT_UPLOADS, 'ttl': UPLOAD_TTL, 'quota': UPLOAD_QUOTA},
+        'results': {'path': ROOT_RESULT, 'ttl': RESULT_TTL, 'quota': RESULT_QUOTA},
+        'index_cube': {'path': ROOT_CUBE, 'ttl': CUBE_TTL, 'quota': CUBE_QUOTA},
+    },
+    interval=JANITOR_INTERVAL,
+    grace_seconds=JANITOR_GRACE_SECONDS,
+    lock_path=os.path.join(ROOT_CACHE, 'janitor.lock'),
+    state_path=os.path.join(ROOT_CACHE, 'janitor_status.json')
+)
+
+def start_janitor():
+    """
+    Jalankan janitor sekali per server. Dipanggil dari hook post_fork gunicorn
+    (gunicorn.conf.py) dan dari proses anak reloader dev server, bukan saat impor:
+    dengan --preload thread di master tidak ikut ter-fork ke worker.
+    """
+    if not JANITOR_ENABLED:
+        return False
+    return janitor.start()
+
+@app.route('/janitor/status', methods=['GET', 'POST'])
+def janitor_status():
+    """Status pembersih (byte yang diklaim ulang, pemakaian per folder). POST = jalankan sekarang."""
+    if not is_admin():
+        return jsonify({'error': 'Akses ditolak. Hanya admin.'}), 403
+    if request.method == 'POST':
+        return jsonify(janitor.run_once())
+    return jsonify(janitor.status())
+
+
+@app.route('/dedup/status', methods=['GET', 'POST'])
+def dedup_status():
+    """Laporan penghematan ruang penyimpanan upload. POST = hapus juga blob yang tidak terpakai."""
+    if not is_admin():
+        return jsonify({'error': 'Akses ditolak. Hanya admin.'}), 403
+    return jsonify(blob_store.report(prune=request.method == 'POST'))
+
+
 # ========================
 # 🚀 ENTRY POINT
 # ========================
 
+if PREWARM_ENABLED:
+    prewarm_modules()
+
 if __name__ == '__main__':
+    # Reloader debug menjalankan dua proses; janitor hanya di proses yang melayani request
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_janitor()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
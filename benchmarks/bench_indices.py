@@ -0,0 +1,45 @@
+"""
+Waktu process_climpact_data untuk satu stasiun sintetis 30 tahun (median beberapa putaran).
+
+    python benchmarks/bench_indices.py [--repeat 5] [--years 30]
+
+Bandingkan dengan commit lain memakai `git worktree add /tmp/lama <commit>` lalu jalankan
+skrip yang sama dengan `--root /tmp/lama`.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--years', type=int, default=30)
+    parser.add_argument('--root', default=os.path.dirname(HERE), help='root repo yang diukur')
+    args = parser.parse_args()
+
+    sys.path.insert(0, HERE)
+    sys.path.insert(0, os.path.abspath(args.root))
+    from station_data import write_station_csv
+    from utils.climpact_processor import process_climpact_data
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_station_csv(os.path.join(tmp, 'stasiun.csv'), end_year=1990 + args.years)
+        process_climpact_data(path)  # pemanasan impor
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result_df, _ = process_climpact_data(path)
+            timings.append(time.perf_counter() - started)
+
+    print(f"process_climpact_data: {args.years} tahun, {len(result_df.columns)} indeks")
+    print(f"median {statistics.median(timings):.3f} s  (min {min(timings):.3f} s, n={args.repeat})")
+
+
+if __name__ == '__main__':
+    main()
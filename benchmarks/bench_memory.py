@@ -0,0 +1,55 @@
+"""
+Memori puncak (tracemalloc) load_station_data dan process_climpact_data untuk satu
+stasiun sintetis, serta ukuran frame harian yang disimpan.
+
+    python benchmarks/bench_memory.py [--years 30]
+
+Seperti bench_indices.py, `--root` menunjuk ke checkout lain untuk perbandingan.
+"""
+import os
+import sys
+import argparse
+import tempfile
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def peak_memory(fn):
+    """(hasil, memori puncak byte, memori tertahan byte) selama fn() dijalankan."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--years', type=int, default=30)
+    parser.add_argument('--root', default=os.path.dirname(HERE), help='root repo yang diukur')
+    args = parser.parse_args()
+
+    sys.path.insert(0, HERE)
+    sys.path.insert(0, os.path.abspath(args.root))
+    from station_data import write_station_csv
+    from utils.climpact_processor import load_station_data, process_climpact_data
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_station_csv(os.path.join(tmp, 'stasiun.csv'), end_year=1990 + args.years)
+        process_climpact_data(path)  # pemanasan impor & cache pandas
+
+        (df, *_), peak, retained = peak_memory(lambda: load_station_data(path))
+        print(f"load_station_data:     puncak {peak / 1e6:6.2f} MB, tertahan {retained / 1e6:6.2f} MB")
+        _, peak, retained = peak_memory(lambda: process_climpact_data(path))
+        print(f"process_climpact_data: puncak {peak / 1e6:6.2f} MB, tertahan {retained / 1e6:6.2f} MB")
+
+    dtypes = ', '.join(f"{col}={dtype}" for col, dtype in df.dtypes.astype(str).items())
+    print(f"frame harian: {df.memory_usage(deep=True).sum() / 1e6:.2f} MB ({dtypes})")
+
+
+if __name__ == '__main__':
+    main()
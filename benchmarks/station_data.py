@@ -0,0 +1,37 @@
+import os
+import numpy as np
+import pandas as pd
+
+HEADER = ['DATA_TIMESTAMP', 'WMO_ID', 'NAME', 'CURRENT_LATITUDE', 'CURRENT_LONGITUDE',
+          'tave', 'tmin', 'tmax', 'ch', 'YEAR', 'MONTH', 'DAY']
+
+
+def write_station_csv(path, start_year=1991, end_year=2020, lat=-6.1, lon=106.8, seed=0):
+    """Tulis file stasiun sintetis (format upload ClimPACT, delimiter ;) untuk benchmark."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f"{start_year}-01-01", f"{end_year}-12-31", freq='D')
+    doy = dates.dayofyear.to_numpy()
+    seasonal = 0.8 * np.cos(2 * np.pi * (doy - 30) / 365.25)
+    tave = 26.5 + seasonal + rng.normal(0, 0.7, len(dates))
+    tmin = tave - 3.5 + rng.normal(0, 0.5, len(dates))
+    tmax = tave + 3.5 + rng.normal(0, 0.8, len(dates))
+    wet = rng.random(len(dates)) < 0.45
+    ch = np.where(wet, rng.gamma(0.8, 14.0, len(dates)), 0.0)
+
+    frame = pd.DataFrame({
+        'DATA_TIMESTAMP': dates.strftime('%d/%m/%Y'),
+        'WMO_ID': 96001,
+        'NAME': 'Stasiun Benchmark',
+        'CURRENT_LATITUDE': lat,
+        'CURRENT_LONGITUDE': lon,
+        'tave': tave.round(1),
+        'tmin': tmin.round(1),
+        'tmax': tmax.round(1),
+        'ch': ch.round(1),
+        'YEAR': dates.year,
+        'MONTH': dates.month,
+        'DAY': dates.day,
+    }, columns=HEADER)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    frame.to_csv(path, sep=';', index=False)
+    return path
@@ -1,2 +1,23 @@
 BLOCKED_PATHS = [
     "/admin/","REANALYSIS","OBSERVASI","PROJECTION",]
+
+# Modul berat yang dimuat lebih awal di proses master (CCIS_PREWARM=1)
+PREWARM_MODULES = [
+    "pandas", "numpy",
+    "utils.climpact_processor", "utils.batch_processor",
+    "utils.result_exporter", "utils.anomaly_engine", "utils.index_cube",
+    "utils.region_aggregator", "utils.preflight",
+]
+
+# Pembersih otomatis data/uploads, data/results & kubus indeks (detik / byte)
+JANITOR_INTERVAL = 600
+JANITOR_GRACE_SECONDS = 300
+UPLOAD_TTL = 6 * 3600
+UPLOAD_QUOTA = 2 * 1024 ** 3
+RESULT_TTL = 7 * 24 * 3600
+RESULT_QUOTA = 10 * 1024 ** 3
+CUBE_TTL = 30 * 24 * 3600
+CUBE_QUOTA = 2 * 1024 ** 3
+
+# ZIP hasil batch disusun di memori sampai batas ini, lebih besar dipindah ke file sementara (byte)
+BATCH_SPOOL_BYTES = 64 * 1024 ** 2
@@ -0,0 +1,8 @@
+# Konfigurasi gunicorn (dibaca otomatis dari folder kerja).
+# Janitor dijalankan setelah fork, bukan saat impor app; kunci file di start_janitor()
+# memastikan hanya satu worker yang menjalankannya (worker pengganti mengambil alih).
+
+
+def post_fork(server, worker):
+    from app import start_janitor
+    start_janitor()
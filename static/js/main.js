@@ -19,6 +19,7 @@ document.addEventListener('DOMContentLoaded', () => {
   // Inisialisasi semua fitur
   initClimpactAutoFill();
   initClimpactFormHandler();
+  initClimpactPreflight();
   initFileManager();
 });
 
@@ -145,6 +146,81 @@ function initClimpactFormHandler() {
   });
 }
 
+// ==================================
+// ✅ Pre-flight Batch Climpact
+// ==================================
+function initClimpactPreflight() {
+  const form = document.getElementById('climpactBatchForm');
+  const button = document.getElementById('preflight-btn');
+  const reportBox = document.getElementById('preflight-report');
+  if (!form || !button || !reportBox) return;
+
+  const escapeHtml = (text) => String(text ?? '').replace(/[&<>"']/g, c => ({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+  })[c]);
+
+  // Server hanya membaca awal & akhir file: kirim potongan itu saja, bukan seluruh file
+  const HEAD_BYTES = 16 * 1024;
+  const TAIL_BYTES = 4 * 1024;
+
+  button.addEventListener('click', async () => {
+    const files = form.querySelector('input[name="station_files"]').files;
+    if (!files.length) {
+      alert('Pilih file stasiun terlebih dahulu.');
+      return;
+    }
+
+    const formData = new FormData();
+    for (const file of files) {
+      formData.append('station_head', file.slice(0, HEAD_BYTES), file.name);
+      formData.append('station_tail', file.slice(-TAIL_BYTES), file.name);
+      formData.append('station_size', file.size);
+    }
+    formData.append('start_year', form.querySelector('input[name="start_year"]').value);
+    formData.append('end_year', form.querySelector('input[name="end_year"]').value);
+
+    button.disabled = true;
+    reportBox.innerHTML = '<p class="text-muted">⏳ Memeriksa file...</p>';
+    try {
+      const res = await fetch('/climpact/batch/preflight', { method: 'POST', body: formData });
+      const data = await res.json();
+      if (!res.ok) {
+        reportBox.innerHTML = `<div class="alert alert-danger">${escapeHtml(data.error || 'Gagal memeriksa file.')}</div>`;
+        return;
+      }
+
+      const rows = data.files.map(f => {
+        const notes = [
+          ...f.errors.map(e => `<div class="text-danger">❌ ${escapeHtml(e)}</div>`),
+          ...f.warnings.map(w => `<div class="text-warning">⚠️ ${escapeHtml(w)}</div>`)
+        ].join('') || '<span class="text-success">OK</span>';
+        const period = f.year_start ? `${f.year_start}–${f.year_end}` : '-';
+        return `<tr class="${f.ok ? '' : 'table-danger'}">
+          <td>${f.ok ? '✅' : '❌'} ${escapeHtml(f.filename)}</td>
+          <td>${escapeHtml(f.station_name || '-')}</td>
+          <td>${period}</td>
+          <td>${notes}</td>
+        </tr>`;
+      }).join('');
+
+      reportBox.innerHTML = `
+        <div class="alert ${data.invalid ? 'alert-warning' : 'alert-success'}">
+          ${data.valid} dari ${data.total} file valid (${data.elapsed} detik).
+        </div>
+        <div class="table-responsive">
+          <table class="table table-sm">
+            <thead><tr><th>File</th><th>Stasiun</th><th>Periode</th><th>Hasil Pemeriksaan</th></tr></thead>
+            <tbody>${rows}</tbody>
+          </table>
+        </div>`;
+    } catch (err) {
+      reportBox.innerHTML = `<div class="alert alert-danger">Gagal memeriksa file: ${escapeHtml(err.message)}</div>`;
+    } finally {
+      button.disabled = false;
+    }
+  });
+}
+
 // ==================================
 // 🔀 SORT ITEMS — GLOBAL FUNCTION (WAJIB DI LUAR initFileManager)
 // ==================================
@@ -304,6 +380,22 @@ function initFileManager() {
     });
   }
 
+  // Tampilan grid untuk folder berisi gambar
+  const gridToggle = document.getElementById('grid-toggle');
+  const fileList = document.getElementById('file-list');
+  if (gridToggle && fileList) {
+    const applyGrid = (isGrid) => {
+      fileList.classList.toggle('grid-view', isGrid);
+      gridToggle.textContent = isGrid ? '📄 Tampilan Daftar' : '🖼️ Tampilan Grid';
+    };
+    applyGrid(localStorage.getItem('gridView') === 'true');
+    gridToggle.addEventListener('click', () => {
+      const isGrid = !fileList.classList.contains('grid-view');
+      localStorage.setItem('gridView', isGrid);
+      applyGrid(isGrid);
+    });
+  }
+
   // Search — ✅ DIPERBAIKI: gunakan .item-name
   if (searchInput) {
     searchInput.addEventListener('input', () => {
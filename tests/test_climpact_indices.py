@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.anomaly_engine import load_stations
+from utils.climpact_processor import idxTempSpell, load_station_data
+
+
+def _station_frame(start, end, tave):
+    """Frame harian ringkas seperti keluaran load_station_data; `tave` = fungsi tanggal -> suhu."""
+    dates = pd.date_range(start, end, freq='D')
+    tg = np.array([tave(d) for d in dates], dtype=float)
+    return pd.DataFrame({
+        'date': dates,
+        'YEAR': dates.year,
+        'tave': tg,
+        'tmin': tg - 4,
+        'tmax': tg + 4,
+    })
+
+
+def test_gsl_bbs_musim_akhir_parsial_bernilai_nan():
+    # Stasiun tropis BBS (lat -6.2): musim Juli–Juni, data berakhir 31 Des 2002
+    df = _station_frame('2000-01-01', '2002-12-31', lambda d: 27.0)
+    gsl = idxTempSpell(df, 'tave', 'tmax', 'tmin', lat=-6.2)['GSL']
+
+    assert gsl.loc[2000] == 365.0   # Jul 2000 – Jun 2001
+    assert gsl.loc[2001] == 365.0   # Jul 2001 – Jun 2002
+    assert np.isnan(gsl.loc[2002])  # hanya Jul–Des 2002
+
+
+def test_gsl_bbu_tahun_awal_dan_akhir_parsial_bernilai_nan():
+    df = _station_frame('2000-03-01', '2002-06-30', lambda d: 27.0)
+    gsl = idxTempSpell(df, 'tave', 'tmax', 'tmin', lat=5.5)['GSL']
+
+    assert np.isnan(gsl.loc[2000])
+    assert gsl.loc[2001] == 365.0
+    assert np.isnan(gsl.loc[2002])
+
+
+def test_gsl_akhir_musim_dicari_setelah_awal_musim():
+    # Dingin hingga 15 Jul (dengan jeda hangat 1–3 Jul), hangat 16 Jul – 31 Okt, dingin lagi
+    def tave(d):
+        if d.month == 7 and d.day <= 3:
+            return 10.0
+        if (d.month == 7 and d.day >= 16) or d.month in (8, 9, 10):
+            return 10.0
+        return 0.0
+
+    df = _station_frame('2001-01-01', '2001-12-31', tave)
+    gsl = idxTempSpell(df, 'tave', 'tmax', 'tmin', lat=45.0)['GSL']
+
+    # Rangkaian dingin 4–15 Jul mendahului awal musim; akhir musim = 1 Nov
+    assert gsl.loc[2001] == (pd.Timestamp('2001-11-01') - pd.Timestamp('2001-07-16')).days
+
+
+def _write_station_csv(path, rows):
+    header = 'DATA_TIMESTAMP;NAME;CURRENT_LATITUDE;CURRENT_LONGITUDE;tave;tmin;tmax;ch;YEAR'
+    path.write_text('\n'.join([header] + rows) + '\n')
+    return str(path)
+
+
+def test_load_station_data_menolak_nilai_non_angka(tmp_path):
+    path = _write_station_csv(tmp_path / 'stasiun.csv', [
+        '01/01/2001;Stasiun A;-6.2;106.8;27.0;23.0;31.0;0.0;2001',
+        '02/01/2001;Stasiun A;-6.2;106.8;27.1;23.2;x;1.5;2001',
+    ])
+    with pytest.raises(ValueError, match="Kolom 'tmax' berisi 1 nilai non-angka"):
+        load_station_data(path)
+
+
+def test_load_station_data_sel_kosong_tetap_nan(tmp_path):
+    path = _write_station_csv(tmp_path / 'stasiun.csv', [
+        '01/01/2001;Stasiun A;-6.2;106.8;27.0;23.0;31.0;0.0;2001',
+        '02/01/2001;Stasiun A;-6.2;106.8;27.1;23.2;;1.5;2001',
+    ])
+    df, *_ = load_station_data(path)
+    assert np.isnan(df['tmax'].iloc[1])
+
+
+def test_load_stations_menolak_nama_stasiun_ganda(tmp_path):
+    a = _write_station_csv(tmp_path / 'a.csv', ['01/01/2001;Stasiun A;-6.1;106.8;27.0;23.0;31.0;0.0;2001'])
+    b = _write_station_csv(tmp_path / 'b.csv', ['01/01/2001;Stasiun A;3.5;98.7;25.0;21.0;29.0;0.0;2001'])
+    with pytest.raises(ValueError, match="Nama stasiun 'Stasiun A' dipakai lebih dari satu file"):
+        load_stations([a, b])
@@ -0,0 +1,23 @@
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('pandas', 'numpy', 'PIL', 'netCDF4')
+
+
+def test_import_app_tidak_memuat_modul_berat():
+    """`import app` harus tetap ringan: pandas/numpy/PIL/netCDF4 hanya dimuat saat dibutuhkan."""
+    env = dict(os.environ, CCIS_JANITOR='0')
+    env.pop('CCIS_PREWARM', None)
+    code = (
+        "import sys, json, app; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    out = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    )
+    loaded = json.loads(out.stdout.strip().splitlines()[-1])
+    assert loaded == []
@@ -0,0 +1,156 @@
+import os
+import pandas as pd
+import numpy as np
+from .climpact_processor import load_station_data, as_float64
+
+# --- Konfigurasi Klimatologi ---
+BASE_PERIOD = (1991, 2020)
+MIN_VALID_DAY_FRACTION = 0.8     # bulan dianggap lengkap jika >= 80% hari terisi
+MIN_BASE_YEARS = 24              # minimal tahun valid per bulan dalam periode dasar (80% dari 30)
+VARIABLE_AGGREGATION = {
+    'tave': 'mean',
+    'tmax': 'mean',
+    'tmin': 'mean',
+    'ch': 'sum',
+}
+
+
+def load_stations(file_paths, variable='tave'):
+    """
+    Baca semua file stasiun lalu susun matriks hari × stasiun untuk satu variabel.
+    Stasiun dikenali dari NAME, sehingga nama yang sama di dua file ditolak (bukan ditimpa).
+    Mengembalikan (matrix, tabel metadata stasiun).
+    """
+    if variable not in VARIABLE_AGGREGATION:
+        raise ValueError(f"Variabel '{variable}' tidak didukung.")
+
+    series, meta = {}, []
+    for path in file_paths:
+        df, station_name, lat, lon = load_station_data(path)
+        if station_name in series:
+            raise ValueError(
+                f"Nama stasiun '{station_name}' dipakai lebih dari satu file "
+                f"({os.path.basename(path)}); setiap stasiun harus punya NAME unik."
+            )
+        if variable not in df.columns:
+            raise ValueError(f"Kolom '{variable}' tidak ditemukan pada stasiun {station_name}.")
+        values = as_float64(df[variable])
+        series[station_name] = pd.Series(values.to_numpy(), index=df['date']).groupby(level=0).mean()
+        meta.append({'station_name': station_name, 'latitude': lat, 'longitude': lon})
+
+    if not series:
+        raise ValueError("Tidak ada file stasiun yang diproses.")
+
+    matrix = pd.DataFrame(series).sort_index()
+    full_days = pd.date_range(matrix.index.min(), matrix.index.max(), freq='D')
+    matrix = matrix.reindex(full_days)
+    stations = pd.DataFrame(meta).set_index('station_name')
+    return matrix, stations
+
+
+def monthly_values(matrix, variable='tave', min_valid_fraction=MIN_VALID_DAY_FRACTION):
+    """Agregasi bulanan semua stasiun sekaligus; bulan dengan data kurang lengkap menjadi NaN."""
+    months = matrix.index.to_period('M')
+    grouped = matrix.groupby(months)
+    valid = grouped.count()
+    days = pd.Series(months.days_in_month, index=months).groupby(level=0).first()
+
+    if VARIABLE_AGGREGATION[variable] == 'sum':
+        values = grouped.sum(min_count=1)
+    else:
+        values = grouped.mean()
+
+    complete = valid.div(days, axis=0) >= min_valid_fraction
+    return values.where(complete)
+
+
+def compute_climatology(monthly, base_start=BASE_PERIOD[0], base_end=BASE_PERIOD[1],
+                        min_years=MIN_BASE_YEARS):
+    """Normal bulanan (bulan 1–12 × stasiun) dari periode dasar; butuh minimal `min_years` tahun valid."""
+    base = monthly[(monthly.index.year >= base_start) & (monthly.index.year <= base_end)]
+    by_month = base.groupby(base.index.month)
+    normal = by_month.mean().where(by_month.count() >= min_years)
+    normal.index.name = 'month'
+    return normal.reindex(range(1, 13))
+
+
+def _climatology_cache_path(cache_dir, variable, base_start, base_end):
+    return os.path.join(cache_dir, f"climatology_{variable}_{base_start}_{base_end}.csv")
+
+
+def get_climatology(monthly, cache_dir, variable='tave', base_start=BASE_PERIOD[0],
+                    base_end=BASE_PERIOD[1], refresh=False):
+    """
+    Ambil normal bulanan dari cache per periode dasar.
+    Hanya stasiun yang belum ada di cache yang dihitung, lalu cache diperbarui.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _climatology_cache_path(cache_dir, variable, base_start, base_end)
+
+    cached = pd.DataFrame(index=pd.RangeIndex(1, 13, name='month'))
+    if os.path.exists(path) and not refresh:
+        cached = pd.read_csv(path, index_col='month')
+
+    missing = [s for s in monthly.columns if s not in cached.columns]
+    if missing:
+        fresh = compute_climatology(monthly[missing], base_start, base_end)
+        fresh = fresh.loc[:, fresh.notna().any()]   # stasiun tanpa data periode dasar tidak di-cache
+        if not fresh.empty:
+            cached = pd.concat([cached, fresh], axis=1)
+            tmp_path = f"{path}.tmp"
+            cached.to_csv(tmp_path)
+            os.replace(tmp_path, path)
+
+    return cached.reindex(columns=monthly.columns)
+
+
+def monthly_anomaly_report(file_paths, year, month, cache_dir, variable='tave',
+                           base_start=BASE_PERIOD[0], base_end=BASE_PERIOD[1], refresh=False):
+    """
+    Hitung nilai bulanan, anomali terhadap normal periode dasar, dan selisih terhadap
+    bulan sebelumnya untuk semua stasiun. Mengembalikan tabel stasiun terurut
+    berdasarkan anomali (tertinggi ke terendah) beserta ringkasan nasional.
+    """
+    year, month = int(year), int(month)
+    if not 1 <= month <= 12:
+        raise ValueError("Bulan harus antara 1 dan 12.")
+
+    matrix, stations = load_stations(file_paths, variable)
+    monthly = monthly_values(matrix, variable)
+    normal = get_climatology(monthly, cache_dir, variable, base_start, base_end, refresh=refresh)
+
+    target = pd.Period(year=year, month=month, freq='M')
+    if target not in monthly.index:
+        raise ValueError(f"Tidak ada data untuk bulan {month:02d}/{year}.")
+    previous = target - 1
+
+    current = monthly.loc[target]
+    prev_values = monthly.loc[previous] if previous in monthly.index else pd.Series(np.nan, index=monthly.columns)
+    normal_month = normal.loc[month]
+
+    table = pd.DataFrame({
+        'value': current,
+        'normal': normal_month,
+        'anomaly': current - normal_month,
+        'previous_value': prev_values,
+        'mdiff': current - prev_values,
+    })
+    table = stations.join(table, how='right').round(2)
+    table.index.name = 'station_name'
+    table = table.sort_values('anomaly', ascending=False, na_position='last')
+    table['rank'] = table['anomaly'].rank(ascending=False, method='min')
+
+    return {
+        'variable': variable,
+        'year': year,
+        'month': month,
+        'base_period': f"{base_start}-{base_end}",
+        'station_count': int(table['value'].notna().sum()),
+        'mean_value': _round_or_none(table['value'].mean()),
+        'mean_anomaly': _round_or_none(table['anomaly'].mean()),
+        'table': table.reset_index(),
+    }
+
+
+def _round_or_none(value, digits=2):
+    return None if pd.isna(value) else round(float(value), digits)
@@ -3,70 +3,86 @@ import pandas as pd
 import zipfile
 from datetime import datetime
 from .climpact_processor import process_climpact_data
+from .result_exporter import (
+    iter_export, to_long_table, default_batch_format, export_filename, check_export_support
+)
 
-def process_batch(station_files, start_year=None, end_year=None, output_dir=None):
+def process_batch(station_files, output, start_year=None, end_year=None, work_dir=None, export_format=None,
+                  cube=None):
     """
-    Proses banyak file stasiun sekaligus.
-    Mengembalikan:
-        - path ke ZIP hasil
-        - path ke summary CSV
+    Proses banyak file stasiun sekaligus lalu tulis SATU ZIP ke `output` (file-like yang bisa di-seek):
+        - indices_all_stations.<ext>: hasil semua stasiun sebagai tabel panjang (Parquet jika tersedia, atau CSV)
+        - summary_all_stations.csv: ringkasan per stasiun
+    File masukan hanya disimpan sementara di `work_dir` selama stasiunnya dihitung; tidak ada
+    hasil lain yang ditulis ke disk.
+    Jika `cube` (IndexCube) diberikan, hasil diambil dari/diisikan ke kubus indeks.
+    Mengembalikan DataFrame ringkasan.
     """
-    if output_dir is None:
-        output_dir = f"uploads/batch_{int(datetime.now().timestamp())}"
-    os.makedirs(output_dir, exist_ok=True)
+    if work_dir is None:
+        work_dir = f"uploads/batch_{int(datetime.now().timestamp())}"
+    os.makedirs(work_dir, exist_ok=True)
+    if export_format is None:
+        export_format = default_batch_format()
+    # Paket opsional dicek lebih dulu agar tidak gagal setelah semua stasiun dihitung
+    check_export_support(export_format)
 
     all_summaries = []
-    zip_path = os.path.join(output_dir, "hasil_batch_stasiun.zip")
+    all_results = []
 
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for file in station_files:
-            try:
-                # Simpan file sementara
-                filename = os.path.basename(file.filename)
-                filepath = os.path.join(output_dir, filename)
-                file.save(filepath)
-
-                # Proses satu stasiun
-                result_df, metadata = process_climpact_data(filepath, start_year, end_year)
+    for file in station_files:
+        try:
+            # Simpan file sementara
+            filename = os.path.basename(file.filename)
+            filepath = os.path.join(work_dir, filename)
+            file.save(filepath)
 
-                # Simpan hasil per stasiun ke ZIP
-                csv_name = f"{metadata['station_name'].replace(' ', '_')}_indices.csv"
-                csv_path = os.path.join(output_dir, csv_name)
-                result_df.to_csv(csv_path)
-                zf.write(csv_path, arcname=csv_name)
+            # Proses satu stasiun, file masukan langsung dihapus dari folder job
+            try:
+                if cube is not None:
+                    _, result_df, metadata = cube.get_or_build(filepath, start_year, end_year)
+                else:
+                    result_df, metadata = process_climpact_data(filepath, start_year, end_year)
+            finally:
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+            all_results.append((metadata, result_df))
 
-                # Tambahkan ke ringkasan
-                summary = {
-                    'station_name': metadata['station_name'],
-                    'latitude': metadata['latitude'],
-                    'longitude': metadata['longitude'],
-                    'period_start': metadata['base_period_start'],
-                    'period_end': metadata['base_period_end'],
-                    'total_years': metadata['total_years']
-                }
+            # Tambahkan ke ringkasan
+            summary = {
+                'station_name': metadata['station_name'],
+                'latitude': metadata['latitude'],
+                'longitude': metadata['longitude'],
+                'period_start': metadata['base_period_start'],
+                'period_end': metadata['base_period_end'],
+                'total_years': metadata['total_years']
+            }
 
-                # Ambil rata-rata indeks
-                for col in result_df.columns:
-                    summary[f"avg_{col}"] = result_df[col].mean()
+            # Ambil rata-rata indeks
+            for col in result_df.columns:
+                summary[f"avg_{col}"] = result_df[col].mean()
 
-                all_summaries.append(summary)
+            all_summaries.append(summary)
 
-            except Exception as e:
-                # Jika gagal, catat error dan lanjut
-                error_summary = {
-                    'station_name': getattr(file, 'filename', 'unknown'),
-                    'latitude': None,
-                    'longitude': None,
-                    'period_start': None,
-                    'period_end': None,
-                    'total_years': 0,
-                    'error': str(e)
-                }
-                all_summaries.append(error_summary)
+        except Exception as e:
+            # Jika gagal, catat error dan lanjut
+            error_summary = {
+                'station_name': getattr(file, 'filename', 'unknown'),
+                'latitude': None,
+                'longitude': None,
+                'period_start': None,
+                'period_end': None,
+                'total_years': 0,
+                'error': str(e)
+            }
+            all_summaries.append(error_summary)
 
-    # Buat summary CSV
+    # Satu file kolumnar untuk semua stasiun dan ringkasannya, di-stream langsung ke dalam ZIP
+    combined = to_long_table(all_results)
     summary_df = pd.DataFrame(all_summaries)
-    summary_path = os.path.join(output_dir, "summary_all_stations.csv")
-    summary_df.to_csv(summary_path, index=False)
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
+        with zf.open(export_filename("indices_all_stations", export_format), 'w') as member:
+            for chunk in iter_export(combined, export_format):
+                member.write(chunk)
+        zf.writestr("summary_all_stations.csv", summary_df.to_csv(index=False))
 
-    return zip_path, summary_path
\ No newline at end of file
+    return summary_df
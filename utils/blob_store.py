@@ -0,0 +1,388 @@
+import os
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+# --- Penyimpanan Berbasis Isi (content-addressed) untuk upload files/ ---
+# Setiap upload di-hash (SHA-256) sambil ditulis. Di filesystem dengan reflink
+# (btrfs, XFS) isi disimpan sekali sebagai blob read-only
+# data/blobs/objects/<2 hex>/<sha256> dan file di files/ adalah klon copy-on-write-nya:
+# menulis ulang satu file tidak mengubah blob maupun file lain. Tanpa reflink (mis. ext4)
+# file dan blob berbagi inode lewat hard link yang dibuat read-only (0444), sehingga
+# tidak bisa ditulis di tempat; mengganti file (hapus lalu unggah) memutus link-nya.
+# Jika data/ dan files/ berada di filesystem berbeda, file hanya disimpan di folder
+# tujuan (tanpa blob) dan dedup lintas folder tidak aktif. Indeks kecil (SQLite)
+# mencatat hash per path sehingga ETag dan cek integritas tidak perlu membaca ulang file.
+HASH_CHUNK = 1024 * 1024
+ORPHAN_GRACE_SECONDS = 3600       # blob tanpa link lebih muda dari ini tidak dihapus
+FICLONE = 0x40049409              # ioctl reflink Linux (btrfs, XFS)
+BLOB_MODE = 0o444
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    method TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _reflink(source, target):
+    import fcntl
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _try_reflink(source, target):
+    """Klon copy-on-write source ke target; False jika filesystem tidak mendukung."""
+    try:
+        _reflink(source, target)
+        return True
+    except (OSError, ImportError):
+        if os.path.exists(target):
+            os.remove(target)
+        return False
+
+
+def _try_hardlink(source, target):
+    """Hard link source ke target; False jika tidak didukung (mis. beda filesystem)."""
+    try:
+        os.link(source, target)
+        return True
+    except OSError:
+        return False
+
+
+class BlobStore:
+    """Blob SHA-256 + indeks path → hash untuk file di bawah tree_root."""
+
+    def __init__(self, root, tree_root):
+        self.root = root
+        self.tree_root = os.path.realpath(tree_root)
+        self.objects_dir = os.path.join(root, 'objects')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.index_path = os.path.join(root, 'index.sqlite3')
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    # --- Indeks ---
+    def _ensure_ready(self):
+        if self._ready:
+            return
+        with self._init_lock:
+            if not self._ready:
+                os.makedirs(self.objects_dir, exist_ok=True)
+                os.makedirs(self.tmp_dir, exist_ok=True)
+                conn = sqlite3.connect(self.index_path, timeout=30)
+                try:
+                    conn.executescript(_SCHEMA)
+                finally:
+                    conn.close()
+                self._ready = True
+
+    @contextmanager
+    def _index(self):
+        """Koneksi SQLite per pemanggilan (aman untuk thread & proses worker), commit lalu tutup."""
+        self._ensure_ready()
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _relpath(self, path):
+        return os.path.relpath(os.path.realpath(path), self.tree_root)
+
+    def blob_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def lookup(self, path):
+        """Hash SHA-256 file dari indeks, atau None jika belum tercatat / file sudah berubah."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._index() as conn:
+            row = conn.execute(
+                "SELECT sha256, size, mtime_ns, inode FROM files WHERE path = ?",
+                (self._relpath(path),)
+            ).fetchone()
+        if row and (row[1], row[2], row[3]) == (st.st_size, st.st_mtime_ns, st.st_ino):
+            return row[0]
+        return None
+
+    def _record(self, conn, path, digest, method):
+        st = os.stat(path)
+        conn.execute(
+            "INSERT OR REPLACE INTO files (path, sha256, size, mtime_ns, inode, method) VALUES (?, ?, ?, ?, ?, ?)",
+            (self._relpath(path), digest, st.st_size, st.st_mtime_ns, st.st_ino, method)
+        )
+
+    def _bump(self, conn, name, amount):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def forget(self, path):
+        """Hapus entri indeks untuk file atau seluruh isi folder (dipanggil setelah delete)."""
+        rel = self._relpath(path)
+        with self._index() as conn:
+            conn.execute("DELETE FROM files WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                         (rel, rel.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '/%'))
+
+    # --- Upload ---
+    def _iter_blobs(self):
+        if not os.path.isdir(self.objects_dir):
+            return
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for digest in os.listdir(prefix_dir):
+                blob = os.path.join(prefix_dir, digest)
+                try:
+                    yield blob, os.stat(blob)
+                except OSError:
+                    continue
+
+    def _stream_to_tmp(self, stream):
+        """Tulis stream ke file sementara sambil menghitung SHA-256; kembalikan (path, hash, ukuran)."""
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.tmp_dir, f"{os.getpid()}_{threading.get_ident()}_{time.time_ns()}")
+        try:
+            with open(tmp_path, 'wb') as out:
+                while True:
+                    chunk = stream.read(HASH_CHUNK)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest(), size
+
+    def _blob_intact(self, blob, digest, size):
+        """Blob hanya dipakai ulang jika ukuran dan hash-nya masih sesuai namanya."""
+        try:
+            if os.stat(blob).st_size != size:
+                return False
+        except OSError:
+            return False
+        return hash_file(blob) == digest
+
+    def _place(self, tmp_path, digest, size, target):
+        """
+        Letakkan upload di target. Blob utuh yang sudah ada di-reflink (atau di-hard link
+        jika reflink tidak didukung); jika belum ada, file upload dipindah ke target lalu
+        diklon / di-hard link menjadi blob read-only. Jika keduanya gagal, tidak ada blob
+        yang disimpan ('copy').
+        """
+        blob = self.blob_path(digest)
+        intact = self._blob_intact(blob, digest, size)
+        if intact and _try_reflink(blob, target):
+            os.utime(blob)      # blob yatim dipakai lagi: jangan sampai ikut di-prune
+            return 'reflink'
+        if intact and _try_hardlink(blob, target):
+            # Tanpa utime: mtime inode bersama juga milik file lain yang sudah terindeks
+            return 'hardlink'
+
+        shutil.move(tmp_path, target)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        tmp_blob = os.path.join(self.tmp_dir, f"blob_{os.getpid()}_{threading.get_ident()}_{time.time_ns()}")
+        if _try_reflink(target, tmp_blob):
+            os.chmod(tmp_blob, BLOB_MODE)
+            os.replace(tmp_blob, blob)      # juga mengganti blob lama yang rusak
+            return 'reflink'
+        mode = os.stat(target).st_mode & 0o777
+        os.chmod(target, BLOB_MODE)
+        if _try_hardlink(target, tmp_blob):
+            os.replace(tmp_blob, blob)
+            return 'hardlink'
+        os.chmod(target, mode)
+        if not intact and os.path.exists(blob):
+            os.remove(blob)     # blob rusak (mis. hard link lama yang ditulis ulang)
+        return 'copy'
+
+    def _same_content(self, path, digest, size):
+        try:
+            if os.path.getsize(path) != size:
+                return False
+        except OSError:
+            return False
+        known = self.lookup(path)
+        if known is None:
+            known = hash_file(path)
+        return known == digest
+
+    def save_upload(self, file_storage, target_dir, filename):
+        """
+        Simpan satu upload ke target_dir. Jika file bernama sama (atau varian name(n))
+        dengan isi identik sudah ada, tidak dibuat salinan baru. Jika tidak, nama unik
+        dipilih seperti sebelumnya dan file diklon dari blob (reflink) atau dipindah langsung.
+        Mengembalikan dict {name, sha256, size, method}; method 'existing' berarti duplikat dilewati.
+        """
+        self._ensure_ready()
+        tmp_path, digest, size = self._stream_to_tmp(file_storage.stream)
+        try:
+            name, ext = os.path.splitext(filename)
+            candidate, counter = filename, 1
+            with self._index() as conn:
+                while os.path.exists(os.path.join(target_dir, candidate)):
+                    existing = os.path.join(target_dir, candidate)
+                    if os.path.isfile(existing) and self._same_content(existing, digest, size):
+                        if self.lookup(existing) is None:
+                            self._record(conn, existing, digest, 'existing')
+                        self._bump(conn, 'skipped_uploads', 1)
+                        self._bump(conn, 'skipped_bytes', size)
+                        return {'name': candidate, 'sha256': digest, 'size': size, 'method': 'existing'}
+                    candidate = f"{name}({counter}){ext}"
+                    counter += 1
+
+                target = os.path.join(target_dir, candidate)
+                method = self._place(tmp_path, digest, size, target)
+                self._record(conn, target, digest, method)
+            return {'name': candidate, 'sha256': digest, 'size': size, 'method': method}
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def dedup_method(self):
+        """
+        Cara dedup lintas folder yang bisa dipakai: 'reflink', 'hardlink', atau None jika
+        tidak aktif (data/ dan files/ beda filesystem, atau keduanya tidak didukung).
+        """
+        self._ensure_ready()
+        try:
+            if os.stat(self.tmp_dir).st_dev != os.stat(self.tree_root).st_dev:
+                return None
+        except OSError:
+            return None
+        probe = os.path.join(self.tmp_dir, f"probe_{os.getpid()}_{threading.get_ident()}_{time.time_ns()}")
+        clone = f"{probe}.clone"
+        try:
+            with open(probe, 'wb') as f:
+                f.write(b'0')
+            if _try_reflink(probe, clone):
+                return 'reflink'
+            if _try_hardlink(probe, clone):
+                return 'hardlink'
+            return None
+        finally:
+            for path in (probe, clone):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # --- Laporan & Pembersihan ---
+    def report(self, prune=False, now=None):
+        """
+        Ringkasan penghematan ruang. Entri indeks yang file-nya sudah berubah/dihapus dibuang.
+        prune=True juga menghapus blob yatim (tidak lagi di-link dari files/).
+        """
+        now = now or time.time()
+        method = self.dedup_method()
+        with self._index() as conn:
+            rows = conn.execute("SELECT path, sha256, size, mtime_ns, inode, method FROM files").fetchall()
+            stale = []
+            groups = {}
+            for path, digest, size, mtime_ns, inode, method in rows:
+                try:
+                    st = os.stat(os.path.join(self.tree_root, path))
+                except OSError:
+                    stale.append(path)
+                    continue
+                if (st.st_size, st.st_mtime_ns, st.st_ino) != (size, mtime_ns, inode):
+                    stale.append(path)
+                    continue
+                groups.setdefault(digest, []).append((size, inode, method))
+            conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in stale])
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+
+        logical = physical = 0
+        linked_inodes = {}
+        for digest, entries in groups.items():
+            size = entries[0][0]
+            logical += size * len(entries)
+            # Satu inode dihitung sekali; reflink berbagi blok dengan blob
+            inodes = {inode for _, inode, method in entries if method != 'reflink'}
+            physical += size * len(inodes)
+            linked_inodes[digest] = inodes
+
+        blobs = orphan_blobs = orphan_bytes = removed_bytes = 0
+        for blob, st in self._iter_blobs():
+            digest = os.path.basename(blob)
+            blobs += 1
+            if digest in groups:
+                if st.st_ino not in linked_inodes[digest]:
+                    physical += st.st_size          # semua salinan di files/ bukan hard link
+                continue
+            if st.st_nlink > 1:
+                continue                            # hard link lama dari file yang belum terindeks
+            orphan_blobs += 1
+            orphan_bytes += st.st_size
+            if prune and now - st.st_mtime > ORPHAN_GRACE_SECONDS:
+                removed_bytes += _remove_quietly(blob, st.st_size)
+
+        if prune and os.path.isdir(self.tmp_dir):
+            # Sisa upload yang terputus
+            for name in os.listdir(self.tmp_dir):
+                path = os.path.join(self.tmp_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if now - st.st_mtime > ORPHAN_GRACE_SECONDS:
+                    removed_bytes += _remove_quietly(path, st.st_size)
+
+        return {
+            'dedup_method': method,
+            'cross_folder_dedup': method is not None,
+            'note': None if method else (
+                "Dedup lintas folder tidak aktif: filesystem tidak mendukung reflink/hard link "
+                "atau data/ dan files/ berada di filesystem berbeda. Hanya unggahan ulang ke "
+                "folder yang sama yang dilewati."
+            ),
+            'indexed_files': sum(len(entries) for entries in groups.values()),
+            'unique_blobs': len(groups),
+            'blob_count': blobs,
+            'logical_bytes': logical,
+            'physical_bytes': physical,
+            'saved_bytes': logical - physical,
+            'skipped_uploads': counters.get('skipped_uploads', 0),
+            'skipped_bytes': counters.get('skipped_bytes', 0),
+            'orphan_blobs': orphan_blobs,
+            'orphan_bytes': orphan_bytes,
+            'pruned_bytes': removed_bytes,
+            'stale_entries_removed': len(stale),
+        }
+
+
+def _remove_quietly(path, size):
+    try:
+        os.remove(path)
+        return size
+    except OSError:
+        return 0
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
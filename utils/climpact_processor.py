@@ -1,12 +1,45 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime
 import os
 
+# --- Kolom Data Stasiun ---
+STATION_VARIABLES = ['tave', 'tmax', 'tmin', 'ch']
+# float32 menyimpan nilai pengamatan (<= COMPACT_DECIMALS desimal) tanpa kehilangan
+# presisi; nilai dikembalikan ke float64 yang sama persis saat dihitung.
+COMPACT_DECIMALS = 4
+# Indeks yang bergantung pada seluruh periode (persentil global, rangkaian lintas
+# pergantian tahun, musim Juli–Juni) sehingga tidak bisa dipotong dari hasil periode penuh.
+PERIOD_DEPENDENT_INDICES = ['TN10p', 'TX90p', 'HWN', 'HWD', 'HWF', 'GSL']
+
+
+def _compact_float(values):
+    """Simpan sebagai float32 hanya jika konversi balik identik dengan nilai float64 aslinya."""
+    compact = values.astype(np.float32)
+    restored = np.round(compact.astype(np.float64), COMPACT_DECIMALS)
+    if np.array_equal(restored.to_numpy(), values.to_numpy(), equal_nan=True):
+        return compact
+    return values
+
+
+def as_float64(values):
+    """Kebalikan _compact_float: float64 untuk perhitungan agar hasil sama dengan data asli."""
+    if values.dtype == np.float32:
+        return np.round(values.astype(np.float64), COMPACT_DECIMALS)
+    return values.astype(np.float64, copy=False)
+
+
 # --- Fungsi Indeks Suhu ---
 def idxTemp(df, tave, tmax, tmin):
-    df = df.copy()
-    df["DTR"] = df[tmax] - df[tmin]
+    # Hanya kolom yang dipakai yang diubah ke float64 (bukan salinan seluruh frame)
+    df = pd.DataFrame({
+        'YEAR': df['YEAR'],
+        tave: as_float64(df[tave]),
+        tmax: as_float64(df[tmax]),
+        tmin: as_float64(df[tmin]),
+    })
+    DTR = df[tmax] - df[tmin]
 
     # Hitung persentil global (seluruh data)
     p10_tmin = df[tmin].quantile(0.10)
@@ -31,7 +64,7 @@ def idxTemp(df, tave, tmax, tmin):
     TNn = df.groupby('YEAR')[tmin].min()
     TNm = df.groupby('YEAR')[tmin].mean()
 
-    DTR_year = df.groupby('YEAR')["DTR"].mean()
+    DTR_year = DTR.groupby(df['YEAR']).mean()
     ETR = TXx - TNn
 
     INDEK_T = pd.DataFrame({
@@ -52,6 +85,128 @@ def idxTemp(df, tave, tmax, tmin):
     return INDEK_T
 
 
+# --- Inti Run-Length & Hitung Ambang (NumPy) ---
+def _run_lengths(mask):
+    """Posisi awal dan panjang setiap rangkaian True berurutan pada array boolean."""
+    edges = np.diff(np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+
+def _yearly_count(values, years, condition):
+    """Jumlah hari per tahun yang memenuhi kondisi; NaN jika seluruh data tahun itu kosong."""
+    valid = ~np.isnan(values)
+    hits = pd.Series(condition & valid).groupby(years).sum().astype(float)
+    return hits.where(pd.Series(valid).groupby(years).any())
+
+
+def _max_run_by_year(mask, years, valid):
+    """
+    Rangkaian terpanjang per tahun, dihitung hanya pada hari valid (NaN dilewati)
+    dan tidak menyambung antar tahun. NaN jika seluruh data tahun itu kosong.
+    """
+    mask, years = mask[valid], years[valid]
+    boundaries = np.flatnonzero(years[1:] != years[:-1]) + 1
+    split_mask = np.insert(mask, boundaries, False)
+    split_years = np.insert(years, boundaries, years[boundaries - 1] if len(boundaries) else [])
+    starts, lengths = _run_lengths(split_mask)
+
+    result = pd.Series(0.0, index=pd.unique(years))
+    if len(starts):
+        longest = pd.Series(lengths).groupby(split_years[starts]).max()
+        result.loc[longest.index] = longest.astype(float)
+    return result
+
+
+def _daily_series(df, col):
+    """Deret harian kontinu (tanggal hilang diisi NaN) agar rangkaian tidak melompati celah data."""
+    series = pd.Series(as_float64(df[col]).to_numpy(), index=df['date'])
+    series = series[~series.index.duplicated()].sort_index()
+    series = series.reindex(pd.date_range(series.index.min(), series.index.max(), freq='D'))
+    return series.to_numpy(dtype=float), series.index
+
+
+def _spells_by_start_year(mask, years, min_length):
+    """Rangkaian >= min_length hari; rangkaian yang melewati pergantian tahun dicatat di tahun mulainya."""
+    starts, lengths = _run_lengths(mask)
+    keep = lengths >= min_length
+    return pd.DataFrame({'YEAR': years[starts[keep]], 'length': lengths[keep]})
+
+
+def _growing_season_length(tg, dates, lat):
+    """
+    GSL (ETCCDI): dari awal rangkaian >= 6 hari TG > 5°C hingga awal rangkaian >= 6 hari
+    TG < 5°C setelah 1 Juli (BBU) atau 1 Januari musim berikutnya (BBS, musim Juli–Juni).
+    Tanpa rangkaian akhir, musim berlangsung hingga akhir jendela musim; jendela musim
+    yang tidak tercakup penuh oleh data (tahun awal/akhir parsial) bernilai NaN.
+    """
+    season_year = dates.year if lat >= 0 else np.where(dates.month >= 7, dates.year, dates.year - 1)
+    midpoint_month = 7 if lat >= 0 else 1
+    gsl = {}
+    for year in pd.unique(season_year):
+        idx = np.flatnonzero(season_year == year)
+        values = tg[idx]
+        if lat >= 0:
+            window = (pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 31))
+        else:
+            window = (pd.Timestamp(year, 7, 1), pd.Timestamp(year + 1, 6, 30))
+        if dates[idx[0]] > window[0] or dates[idx[-1]] < window[1] or np.isnan(values).all():
+            gsl[year] = np.nan
+            continue
+        starts, lengths = _run_lengths(values > 5)
+        starts = starts[lengths >= 6]
+        if not len(starts):
+            gsl[year] = 0.0
+            continue
+        begin = starts[0]
+        after_mid = np.flatnonzero(dates[idx].month == midpoint_month)
+        ends, end_lengths = _run_lengths(values < 5)
+        ends = ends[(end_lengths >= 6) & (ends >= (after_mid[0] if len(after_mid) else len(values)))]
+        ends = ends[ends > begin]
+        end = ends[0] if len(ends) else len(values)
+        gsl[year] = float(end - begin)
+    return pd.Series(gsl)
+
+
+# --- Fungsi Indeks Durasi & Ambang Suhu ---
+def idxTempSpell(df, tave, tmax, tmin, lat=0.0):
+    """
+    SU25, TR20, TXge35, gelombang panas (HWN/HWD/HWF: >= 3 hari TX > persentil 90)
+    dan GSL. Rangkaian dihitung pada deret harian kontinu; NaN/tanggal hilang memutus rangkaian.
+    """
+    tx, dates = _daily_series(df, tmax)
+    tn, _ = _daily_series(df, tmin)
+    tg, _ = _daily_series(df, tave)
+    years = dates.year.to_numpy()
+
+    p90_tmax = as_float64(df[tmax]).quantile(0.90)
+
+    SU25 = _yearly_count(tx, years, tx > 25)
+    TR20 = _yearly_count(tn, years, tn > 20)
+    TXge35 = _yearly_count(tx, years, tx >= 35)
+
+    has_tx = pd.Series(~np.isnan(tx)).groupby(years).any()
+    spells = _spells_by_start_year(tx > p90_tmax, years, 3).groupby('YEAR')['length']
+    no_data = ~has_tx
+    HWN = spells.count().reindex(has_tx.index, fill_value=0).astype(float).mask(no_data)
+    HWD = spells.max().reindex(has_tx.index, fill_value=0).astype(float).mask(no_data)
+    HWF = spells.sum().reindex(has_tx.index, fill_value=0).astype(float).mask(no_data)
+
+    GSL = _growing_season_length(tg, dates, lat)
+
+    INDEK_TS = pd.DataFrame({
+        'SU25': SU25,
+        'TR20': TR20,
+        'TXge35': TXge35,
+        'HWN': HWN,
+        'HWD': HWD,
+        'HWF': HWF,
+        'GSL': GSL
+    })
+    INDEK_TS.index.name = 'YEAR'
+    return INDEK_TS.reindex(pd.unique(df['YEAR'])).round(3)
+
+
 # --- Fungsi Indeks Curah Hujan ---
 def idxRain(df, ch):
     def HHnMM(data, threshold):
@@ -73,33 +228,12 @@ def idxRain(df, ch):
         )
         return result
 
-    def cdd(data, threshold=1):
-        if data.isna().all() or data.empty:
-            return np.nan
-        max_cdd = current = 0
-        for val in data:
-            if pd.isna(val):
-                continue
-            if val < threshold:
-                current += 1
-                max_cdd = max(max_cdd, current)
-            else:
-                current = 0
-        return max_cdd
-
-    def cwd(data, threshold=1):
-        if data.isna().all() or data.empty:
-            return np.nan
-        max_cwd = current = 0
-        for val in data:
-            if pd.isna(val):
-                continue
-            if val >= threshold:
-                current += 1
-                max_cwd = max(max_cwd, current)
-            else:
-                current = 0
-        return max_cwd
+    # CDD/CWD: rangkaian terpanjang per tahun (NaN dilewati), memakai inti run-length
+    rain_series = as_float64(df[ch])
+    order = np.argsort(df['YEAR'].to_numpy(), kind='stable')
+    rain = rain_series.to_numpy()[order]
+    rain_years = df['YEAR'].to_numpy()[order]
+    rain_valid = ~np.isnan(rain)
 
     def RxNDay(data, windows):
         if data.isna().all() or data.empty:
@@ -108,8 +242,8 @@ def idxRain(df, ch):
             return data.max()
         if len(data) < windows:
             return data.sum() if not data.isna().all() else np.nan
-        rolling_sums = [data.iloc[i:i+windows].sum() for i in range(len(data) - windows + 1)]
-        return np.nanmax(rolling_sums) if rolling_sums else np.nan
+        values = np.nan_to_num(data.to_numpy(dtype=float))
+        return sliding_window_view(values, windows).sum(axis=1).max()
 
     def RqP(data, q):
         valid = data[data > 1]
@@ -128,7 +262,7 @@ def idxRain(df, ch):
             )
         )
 
-    yearly = df.groupby('YEAR')[ch]
+    yearly = rain_series.groupby(df['YEAR'])
 
     PRECTOT = yearly.sum()
     HH = yearly.apply(lambda x: HHnMM(x, 1))
@@ -142,8 +276,9 @@ def idxRain(df, ch):
     FH100 = FHnMM(HH100MM, HH)
     FH150 = FHnMM(HH150MM, HH)
 
-    CDD = yearly.apply(lambda x: cdd(x, 1))
-    CWD = yearly.apply(lambda x: cwd(x, 1))
+    all_years = yearly.size().index
+    CDD = _max_run_by_year(rain < 1, rain_years, rain_valid).reindex(all_years)
+    CWD = _max_run_by_year(rain >= 1, rain_years, rain_valid).reindex(all_years)
     SDII = yearly.apply(lambda x: x[x >= 1].sum() / len(x[x >= 1]) if len(x[x >= 1]) > 0 else np.nan)
 
     RX1DAY = yearly.apply(lambda x: RxNDay(x, 1))
@@ -185,33 +320,49 @@ def idxRain(df, ch):
     return INDEK_CH
 
 
-# --- Fungsi Utama Pemrosesan Data ---
-def process_climpact_data(file_path, start_year=None, end_year=None):
+# --- Pembacaan & Validasi File Stasiun ---
+def _numeric_column(values, name):
+    """Kolom variabel sebagai angka; sel kosong = data hilang, teks lain ditolak (bukan diam-diam NaN)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(np.float64, copy=False)
+    numeric = pd.to_numeric(values, errors='coerce')
+    invalid = numeric.isna() & values.notna()
+    if invalid.any():
+        first = invalid.idxmax()
+        raise ValueError(
+            f"Kolom '{name}' berisi {int(invalid.sum())} nilai non-angka "
+            f"(contoh: '{values[first]}' pada baris data ke-{first + 1})."
+        )
+    return numeric.astype(np.float64)
+
+
+def parse_station_dates(values):
+    """Tanggal DATA_TIMESTAMP (DD/MM/YYYY); nilai yang tidak sesuai format menjadi NaT."""
+    return pd.to_datetime(values, format='%d/%m/%Y', errors='coerce')
+
+
+def load_station_data(file_path):
     """
-    Proses file data stasiun dan hitung indeks ekstrem lengkap (suhu & curah hujan).
-    Jika start_year/end_year diberikan, batasi data ke periode tersebut.
+    Baca file stasiun (delimiter ;), validasi kolom wajib, tanggal dan koordinat.
+    Metadata (nama, koordinat) hanya diambil dari baris pertama; frame yang dikembalikan
+    ringkas: 'date', 'YEAR' dan kolom variabel (float32 bila tanpa kehilangan presisi).
+    Mengembalikan (df, nama stasiun, latitude, longitude).
     """
     try:
-        df = pd.read_csv(file_path, sep=';')
+        header = pd.read_csv(file_path, sep=';', nrows=1)
     except Exception as e:
         raise ValueError(f"Error membaca file: {e}")
 
     # Validasi kolom wajib
     required_cols = ['DATA_TIMESTAMP', 'NAME', 'CURRENT_LATITUDE', 'CURRENT_LONGITUDE', 'YEAR']
     for col in required_cols:
-        if col not in df.columns:
+        if col not in header.columns:
             raise ValueError(f"Kolom '{col}' tidak ditemukan dalam file.")
-
-    # Validasi format tanggal
-    try:
-        df['date'] = pd.to_datetime(df['DATA_TIMESTAMP'], format='%d/%m/%Y', errors='coerce')
-    except Exception:
-        raise ValueError("Format tanggal DATA_TIMESTAMP tidak valid. Harus DD/MM/YYYY.")
-    if df['date'].isnull().any():
-        raise ValueError("Format tanggal tidak valid pada beberapa baris.")
+    if header.empty:
+        raise ValueError("File tidak berisi baris data.")
 
     # Ambil metadata dari baris pertama
-    first_row = df.iloc[0]
+    first_row = header.iloc[0]
     station_name = str(first_row['NAME']).strip()
     lat = float(first_row['CURRENT_LATITUDE'])
     lon = float(first_row['CURRENT_LONGITUDE'])
@@ -221,35 +372,38 @@ def process_climpact_data(file_path, start_year=None, end_year=None):
     if not (-180 <= lon <= 180):
         raise ValueError("Longitude harus antara -180 dan 180.")
 
-    # Tentukan rentang tahun
-    data_min_year = int(df['YEAR'].min())
-    data_max_year = int(df['YEAR'].max())
+    # Kolom metadata per baris (NAME, koordinat, WMO_ID, ...) tidak dibaca sama sekali
+    variables = [col for col in STATION_VARIABLES if col in header.columns]
+    try:
+        df = pd.read_csv(file_path, sep=';', usecols=['DATA_TIMESTAMP', 'YEAR'] + variables)
+    except Exception as e:
+        raise ValueError(f"Error membaca file: {e}")
 
-    use_start = int(start_year) if start_year not in (None, '') else None
-    use_end = int(end_year) if end_year not in (None, '') else None
+    # Validasi format tanggal
+    try:
+        dates = parse_station_dates(df.pop('DATA_TIMESTAMP'))
+    except Exception:
+        raise ValueError("Format tanggal DATA_TIMESTAMP tidak valid. Harus DD/MM/YYYY.")
+    if dates.isnull().any():
+        raise ValueError("Format tanggal tidak valid pada beberapa baris.")
+    df.insert(0, 'date', dates)
 
-    if use_start is not None and use_end is not None:
-        if use_start > use_end:
-            raise ValueError("Start Year tidak boleh lebih besar dari End Year.")
-        if use_start < data_min_year or use_end > data_max_year:
-            raise ValueError(
-                f"Periode manual ({use_start}–{use_end}) harus dalam rentang data ({data_min_year}–{data_max_year})."
-            )
-        final_start, final_end = use_start, use_end
-    else:
-        final_start, final_end = data_min_year, data_max_year
+    for col in variables:
+        df[col] = _compact_float(_numeric_column(df[col], col))
+
+    return df, station_name, lat, lon
 
-    # Filter data
-    df = df[(df['YEAR'] >= final_start) & (df['YEAR'] <= final_end)].copy()
-    if df.empty:
-        raise ValueError("Tidak ada data dalam periode yang ditentukan.")
 
-    # Hitung indeks
+# --- Fungsi Utama Pemrosesan Data ---
+def compute_indices(df, lat=0.0):
+    """Semua indeks tahunan (suhu & curah hujan) dari frame harian hasil load_station_data."""
     result_temp = None
     result_rain = None
 
     if all(col in df.columns for col in ['tave', 'tmax', 'tmin']):
-        result_temp = idxTemp(df, 'tave', 'tmax', 'tmin')
+        result_temp = idxTemp(df, 'tave', 'tmax', 'tmin').join(
+            idxTempSpell(df, 'tave', 'tmax', 'tmin', lat=lat)
+        )
     if 'ch' in df.columns:
         result_rain = idxRain(df, 'ch')
 
@@ -266,6 +420,47 @@ def process_climpact_data(file_path, start_year=None, end_year=None):
         ).set_index('YEAR')
     else:
         indices = result_temp if result_temp is not None else result_rain
+    return indices
+
+
+def resolve_period(data_min_year, data_max_year, start_year=None, end_year=None):
+    """
+    Periode akhir (start, end, manual?) dari rentang data dan input pengguna.
+    Periode manual hanya dipakai jika start_year dan end_year keduanya diisi.
+    """
+    use_start = int(start_year) if start_year not in (None, '') else None
+    use_end = int(end_year) if end_year not in (None, '') else None
+
+    if use_start is not None and use_end is not None:
+        if use_start > use_end:
+            raise ValueError("Start Year tidak boleh lebih besar dari End Year.")
+        if use_start < data_min_year or use_end > data_max_year:
+            raise ValueError(
+                f"Periode manual ({use_start}–{use_end}) harus dalam rentang data ({data_min_year}–{data_max_year})."
+            )
+        return use_start, use_end, True
+    return data_min_year, data_max_year, False
+
+
+def process_climpact_data(file_path, start_year=None, end_year=None):
+    """
+    Proses file data stasiun dan hitung indeks ekstrem lengkap (suhu & curah hujan).
+    Jika start_year/end_year diberikan, batasi data ke periode tersebut.
+    """
+    df, station_name, lat, lon = load_station_data(file_path)
+
+    # Tentukan rentang tahun
+    data_min_year = int(df['YEAR'].min())
+    data_max_year = int(df['YEAR'].max())
+    final_start, final_end, manual = resolve_period(data_min_year, data_max_year, start_year, end_year)
+
+    # Filter data (hanya jika periode lebih sempit dari data; frame tidak disalin ulang)
+    if final_start > data_min_year or final_end < data_max_year:
+        df = df[(df['YEAR'] >= final_start) & (df['YEAR'] <= final_end)]
+    if df.empty:
+        raise ValueError("Tidak ada data dalam periode yang ditentukan.")
+
+    indices = compute_indices(df, lat)
 
     # Metadata
     metadata = {
@@ -278,7 +473,7 @@ def process_climpact_data(file_path, start_year=None, end_year=None):
         'total_years': len(indices),
         'data_start_year': data_min_year,
         'data_end_year': data_max_year,
-        'used_manual_period': (use_start is not None and use_end is not None)
+        'used_manual_period': manual
     }
 
     return indices, metadata
\ No newline at end of file
@@ -0,0 +1,196 @@
+import os
+import gzip
+import zlib
+import hashlib
+import mimetypes
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- Konfigurasi Kompresi ---
+COMPRESS_MIN_SIZE = 1024          # response lebih kecil dari ini tidak dikompres
+COMPRESS_LEVEL = 6
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/xml',
+    'text/javascript', 'application/javascript', 'application/json',
+    'application/xml', 'image/svg+xml',
+}
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.html', '.txt')
+# Urutan preferensi encoding -> ekstensi file pre-compressed
+ENCODING_EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+_hash_cache = {}
+
+
+def _supported_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def choose_encoding(accept_encoding, available=None):
+    """Pilih encoding terbaik yang diterima klien (br lebih dulu, lalu gzip)."""
+    accepted = {}
+    for part in (accept_encoding or '').lower().split(','):
+        token, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            accepted[token] = q
+    for encoding in (available if available is not None else _supported_encodings()):
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+
+
+def _compress_stream(iterable, encoding):
+    """Kompres response streaming per potongan tanpa menunggu seluruh isi."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = format gzip
+        process = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+    try:
+        for chunk in iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            out = process(chunk) + flush()
+            if out:
+                yield out
+        yield finish()
+    finally:
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    """after_request: kompres HTML/JSON/CSV dsb. sesuai Accept-Encoding, termasuk response streaming."""
+    if response.status_code != 200 or response.direct_passthrough:
+        return response
+    if 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(_compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# --- Aset Statis: URL ber-hash & file pre-compressed ---
+def static_file_hash(static_folder, filename):
+    """Hash isi file statis (di-cache per mtime) untuk URL yang berubah setiap konten berubah."""
+    path = os.path.join(static_folder, filename)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _hash_cache.get(path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    with open(path, 'rb') as f:
+        digest = hashlib.md5(f.read()).hexdigest()[:10]
+    _hash_cache[path] = (mtime_ns, digest)
+    return digest
+
+
+def _fresh_variant(source_path, encoding):
+    variant = source_path + ENCODING_EXTENSIONS[encoding]
+    try:
+        if os.stat(variant).st_mtime_ns >= os.stat(source_path).st_mtime_ns:
+            return variant
+    except OSError:
+        pass
+    return None
+
+
+def send_static_asset(static_folder, filename):
+    """Kirim file statis; gunakan versi .br/.gz hasil build jika ada dan klien menerimanya."""
+    source_path = os.path.join(static_folder, filename)
+    available = [enc for enc in ENCODING_EXTENSIONS if _fresh_variant(source_path, enc)]
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'), available) if available else None
+
+    if encoding:
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(
+            static_folder, filename + ENCODING_EXTENSIONS[encoding], mimetype=mimetype
+        )
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(static_folder, filename)
+
+    response.vary.add('Accept-Encoding')
+    if request.args.get('v'):
+        response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}, immutable'
+    return response
+
+
+def precompress_static(static_folder):
+    """Langkah build: tulis file .gz (dan .br jika brotli terpasang) di samping aset statis."""
+    written = []
+    for root, dirs, files in os.walk(static_folder):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            source_path = os.path.join(root, name)
+            with open(source_path, 'rb') as f:
+                data = f.read()
+            for encoding in _supported_encodings():
+                target = source_path + ENCODING_EXTENSIONS[encoding]
+                if encoding == 'br':
+                    payload = brotli.compress(data, quality=11)
+                else:
+                    payload = gzip.compress(data, compresslevel=9)
+                if len(payload) >= len(data):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(payload)
+                written.append(target)
+    return written
+
+
+def init_compression(app):
+    """Pasang kompresi response, URL statis ber-hash, dan perintah `flask precompress-static`."""
+    static_folder = app.static_folder
+
+    @app.url_defaults
+    def _static_hash_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            digest = static_file_hash(static_folder, values['filename'])
+            if digest:
+                values['v'] = digest
+
+    app.view_functions['static'] = lambda filename: send_static_asset(static_folder, filename)
+    app.after_request(compress_response)
+
+    @app.cli.command('precompress-static')
+    def _precompress_static_command():
+        """Buat file .gz/.br untuk aset statis (jalankan saat deploy)."""
+        written = precompress_static(static_folder)
+        print(f"✅ {len(written)} file pre-compressed ditulis.")
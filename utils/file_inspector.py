@@ -0,0 +1,298 @@
+import os
+import io
+import csv
+import math
+import mmap
+import struct
+from functools import lru_cache
+
+# --- Konfigurasi Inspeksi ---
+CSV_SAMPLE_ROWS = 20
+NC_SAMPLE_VALUES = 10
+CSV_EXACT_COUNT_LIMIT = 512 * 1024 * 1024   # di atas ini jumlah baris hanya diestimasi
+INSPECTABLE_EXTENSIONS = ('.nc', '.nc4', '.cdf', '.csv', '.txt')
+
+# Tipe data NetCDF classic: kode -> (nama, format struct, ukuran byte)
+NC_TYPES = {
+    1: ('byte', 'b', 1),
+    2: ('char', 'c', 1),
+    3: ('short', 'h', 2),
+    4: ('int', 'i', 4),
+    5: ('float', 'f', 4),
+    6: ('double', 'd', 8),
+    7: ('ubyte', 'B', 1),
+    8: ('ushort', 'H', 2),
+    9: ('uint', 'I', 4),
+    10: ('int64', 'q', 8),
+    11: ('uint64', 'Q', 8),
+}
+NC_DIMENSION = 0x0A
+NC_VARIABLE = 0x0B
+NC_ATTRIBUTE = 0x0C
+HDF5_MAGIC = b'\x89HDF\r\n\x1a\n'
+
+
+def is_inspectable(filename):
+    return filename.lower().endswith(INSPECTABLE_EXTENSIONS)
+
+
+def _json_safe(value):
+    """Ubah nilai numerik agar aman di-serialisasi ke JSON (NaN/inf -> None)."""
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if getattr(value, 'ndim', 0) > 0:
+        return [_json_safe(v) for v in value.tolist()]
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+# --- Pembaca Header NetCDF Classic (CDF-1/2/5) ---
+class _ClassicHeaderReader:
+    """Baca header NetCDF classic langsung dari memory-map tanpa memuat data."""
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 4
+        version = buf[3]
+        if version not in (1, 2, 5):
+            raise ValueError(f"Versi NetCDF classic tidak dikenal: {version}")
+        self.version = version
+        self.size_fmt = '>Q' if version == 5 else '>I'       # NON_NEG
+        self.offset_fmt = '>I' if version == 1 else '>Q'     # OFFSET
+
+    def _unpack(self, fmt):
+        value = struct.unpack_from(fmt, self.buf, self.pos)[0]
+        self.pos += struct.calcsize(fmt)
+        return value
+
+    def _non_neg(self):
+        return self._unpack(self.size_fmt)
+
+    def _name(self):
+        length = self._non_neg()
+        name = bytes(self.buf[self.pos:self.pos + length]).decode('utf-8', errors='replace')
+        self.pos += length + (-length % 4)
+        return name
+
+    def _values(self, nc_type, count):
+        type_name, code, size = NC_TYPES[nc_type]
+        raw = bytes(self.buf[self.pos:self.pos + size * count])
+        self.pos += size * count + (-(size * count) % 4)
+        if type_name == 'char':
+            return raw.rstrip(b'\x00').decode('utf-8', errors='replace')
+        values = [_json_safe(v) for v in struct.unpack(f'>{count}{code}', raw)]
+        return values[0] if count == 1 else values
+
+    def _list_header(self, expected_tag):
+        tag = self._unpack('>I')
+        count = self._non_neg()
+        if tag == 0 and count == 0:
+            return 0
+        if tag != expected_tag:
+            raise ValueError("Header NetCDF rusak atau tidak didukung.")
+        return count
+
+    def _attributes(self):
+        attrs = {}
+        for _ in range(self._list_header(NC_ATTRIBUTE)):
+            name = self._name()
+            nc_type = self._unpack('>I')
+            count = self._non_neg()
+            attrs[name] = self._values(nc_type, count)
+        return attrs
+
+    def read(self):
+        numrecs = self._non_neg()
+        dims = []
+        for _ in range(self._list_header(NC_DIMENSION)):
+            name = self._name()
+            length = self._non_neg()
+            dims.append({'name': name, 'size': length, 'unlimited': length == 0})
+        for dim in dims:
+            if dim['unlimited']:
+                dim['size'] = numrecs
+
+        global_attrs = self._attributes()
+
+        variables = []
+        for _ in range(self._list_header(NC_VARIABLE)):
+            name = self._name()
+            ndims = self._non_neg()
+            dim_ids = [self._non_neg() for _ in range(ndims)]
+            attrs = self._attributes()
+            nc_type = self._unpack('>I')
+            self._non_neg()  # vsize (tidak dipakai)
+            begin = self._unpack(self.offset_fmt)
+            variables.append({
+                'name': name,
+                'dimensions': [dims[i]['name'] for i in dim_ids],
+                'shape': [dims[i]['size'] for i in dim_ids],
+                'dtype': NC_TYPES[nc_type][0],
+                'attributes': attrs,
+                '_type': nc_type,
+                '_begin': begin,
+                '_is_record': bool(dim_ids) and dims[dim_ids[0]]['unlimited'],
+            })
+        return dims, global_attrs, variables
+
+    def sample(self, var, n):
+        """Ambil n nilai pertama variabel (record pertama untuk variabel record)."""
+        shape = var['shape'][1:] if var['_is_record'] else var['shape']
+        if var['_is_record'] and (not var['shape'] or var['shape'][0] == 0):
+            return []
+        total = math.prod(shape) if shape else 1
+        count = min(n, total)
+        type_name, code, size = NC_TYPES[var['_type']]
+        start = var['_begin']
+        raw = bytes(self.buf[start:start + size * count])
+        if len(raw) < size * count:
+            return []
+        if type_name == 'char':
+            return [raw.rstrip(b'\x00').decode('utf-8', errors='replace')]
+        return [_json_safe(v) for v in struct.unpack(f'>{count}{code}', raw)]
+
+
+def _inspect_netcdf_classic(path, sample_values):
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            reader = _ClassicHeaderReader(buf)
+            dims, global_attrs, variables = reader.read()
+            for var in variables:
+                var['sample'] = reader.sample(var, sample_values)
+                for key in ('_type', '_begin', '_is_record'):
+                    var.pop(key)
+            return {
+                'format': f'NetCDF classic (CDF-{reader.version})',
+                'dimensions': dims,
+                'attributes': global_attrs,
+                'variables': variables,
+            }
+
+
+def _inspect_netcdf4(path, sample_values):
+    """NetCDF-4 (HDF5) membutuhkan pustaka netCDF4; hanya slice kecil yang dibaca."""
+    try:
+        import netCDF4
+        import numpy as np
+    except ImportError:
+        raise ValueError("File NetCDF-4/HDF5 membutuhkan paket 'netCDF4' untuk diinspeksi.")
+
+    with netCDF4.Dataset(path, 'r') as ds:
+        dims = [
+            {'name': name, 'size': len(dim), 'unlimited': dim.isunlimited()}
+            for name, dim in ds.dimensions.items()
+        ]
+        variables = []
+        for name, var in ds.variables.items():
+            sample = []
+            if var.size:
+                index = tuple(slice(0, 1) for _ in var.shape[:-1])
+                if var.shape:
+                    index += (slice(0, sample_values),)
+                sample = [
+                    None if v is np.ma.masked else _json_safe(v)
+                    for v in np.ma.ravel(var[index])
+                ]
+            variables.append({
+                'name': name,
+                'dimensions': list(var.dimensions),
+                'shape': list(var.shape),
+                'dtype': str(var.dtype),
+                'attributes': {k: _json_safe(var.getncattr(k)) for k in var.ncattrs()},
+                'sample': sample,
+            })
+        return {
+            'format': f'NetCDF-4 ({ds.data_model})',
+            'dimensions': dims,
+            'attributes': {k: _json_safe(ds.getncattr(k)) for k in ds.ncattrs()},
+            'variables': variables,
+        }
+
+
+# --- Inspeksi CSV ---
+def _count_lines(path, file_size):
+    """Hitung baris tanpa parsing; file sangat besar diestimasi dari rata-rata panjang baris."""
+    if file_size > CSV_EXACT_COUNT_LIMIT:
+        return None
+    count = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            count += chunk.count(b'\n')
+            last = chunk[-1:]
+    if last != b'\n':
+        count += 1
+    return count
+
+
+def _inspect_csv(path, sample_rows):
+    file_size = os.path.getsize(path)
+    head_lines = []
+    head_bytes = 0
+    with open(path, 'rb') as f:
+        for _ in range(sample_rows + 1):
+            line = f.readline()
+            if not line:
+                break
+            head_bytes += len(line)
+            head_lines.append(line.decode('utf-8', errors='replace'))
+
+    if not head_lines:
+        return {'format': 'CSV', 'columns': [], 'rows': [], 'row_count': 0, 'row_count_estimated': False}
+
+    try:
+        delimiter = csv.Sniffer().sniff(head_lines[0], delimiters=';,\t|').delimiter
+    except csv.Error:
+        delimiter = ';'
+
+    rows = list(csv.reader(io.StringIO(''.join(head_lines)), delimiter=delimiter))
+    columns, data_rows = rows[0], rows[1:]
+
+    total_lines = _count_lines(path, file_size)
+    estimated = total_lines is None
+    if estimated:
+        total_lines = int(file_size / (head_bytes / len(head_lines)))
+
+    return {
+        'format': 'CSV',
+        'delimiter': delimiter,
+        'columns': columns,
+        'rows': data_rows,
+        'row_count': max(total_lines - 1, 0),
+        'row_count_estimated': estimated,
+    }
+
+
+@lru_cache(maxsize=256)
+def _inspect_cached(path, mtime_ns, file_size, sample_rows, sample_values):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.csv', '.txt'):
+        summary = _inspect_csv(path, sample_rows)
+    else:
+        with open(path, 'rb') as f:
+            magic = f.read(8)
+        if magic[:3] == b'CDF':
+            summary = _inspect_netcdf_classic(path, sample_values)
+        elif magic == HDF5_MAGIC:
+            summary = _inspect_netcdf4(path, sample_values)
+        else:
+            raise ValueError("File bukan NetCDF yang valid.")
+    summary['file_size'] = file_size
+    return summary
+
+
+def inspect_file(path, sample_rows=CSV_SAMPLE_ROWS, sample_values=NC_SAMPLE_VALUES):
+    """
+    Ringkasan isi file NetCDF/CSV tanpa memuat seluruh file.
+    Hasil di-cache berdasarkan path dan mtime, sehingga file yang berubah diinspeksi ulang.
+    """
+    if not is_inspectable(path):
+        raise ValueError("Jenis file tidak didukung untuk inspeksi.")
+    stat = os.stat(path)
+    return _inspect_cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size, sample_rows, sample_values)
@@ -0,0 +1,42 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """
+    Cache LRU sederhana (thread-safe) untuk potongan HTML hasil render.
+    Kunci sebaiknya memuat semua hal yang memengaruhi isi, mis. (path, mtime, is_admin).
+    Isi yang basi tanpa mengubah kunci (mis. ukuran folder rekursif) diberi `expires_at`.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, expires_at=None):
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,154 @@
+import os
+import glob
+import json
+import pandas as pd
+from datetime import datetime
+from .blob_store import hash_file
+from .fragment_cache import FragmentCache
+from .climpact_processor import (
+    PERIOD_DEPENDENT_INDICES, load_station_data, compute_indices,
+    resolve_period, idxTemp, idxTempSpell
+)
+
+# --- Kubus Indeks Stasiun × Tahun × Indeks ---
+# Setiap dataset stasiun (dikenali dari SHA-256 isi file) dihitung sekali untuk seluruh
+# rentang datanya lalu disimpan di <cache>/<sha256>/:
+#   meta.json       metadata stasiun & rentang data
+#   indices.pkl     hasil periode penuh (tahun × indeks)
+#   daily.pkl       frame harian ringkas, untuk menghitung ulang indeks bergantung periode
+#   period_<s>_<e>.pkl  indeks bergantung periode untuk sub-periode yang pernah diminta
+# Sub-periode lain cukup dipotong dari indices.pkl.
+# meta.json menyimpan CUBE_SCHEMA; entri dengan skema lain dianggap tidak ada lalu dihitung
+# ulang. Naikkan nilainya setiap kali hasil perhitungan indeks berubah (mis. perbaikan GSL).
+CUBE_SCHEMA = 2
+MEMORY_ENTRIES = 64
+
+
+class IndexCube:
+    """Penyimpanan persisten hasil indeks per dataset stasiun dengan cache memori LRU."""
+
+    def __init__(self, cache_dir, memory_entries=MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self._memory = FragmentCache(max_entries=memory_entries)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _write_pickle(self, frame, path):
+        tmp_path = f"{path}.tmp"
+        frame.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def load(self, key):
+        """(indices periode penuh, meta) dari memori atau disk; None jika belum ada."""
+        cached = self._memory.get(key)
+        if cached is not None:
+            return cached
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, 'meta.json')) as f:
+                meta = json.load(f)
+            if meta.get('schema') != CUBE_SCHEMA:
+                return None
+            indices = pd.read_pickle(os.path.join(entry_dir, 'indices.pkl'))
+        except (OSError, ValueError):
+            return None
+        self._memory.set(key, (indices, meta))
+        return indices, meta
+
+    def build(self, file_path, key=None):
+        """Hitung indeks periode penuh untuk satu file stasiun lalu simpan ke kubus."""
+        key = key or hash_file(file_path)
+        df, station_name, lat, lon = load_station_data(file_path)
+        indices = compute_indices(df, lat)
+        meta = {
+            'station_name': station_name,
+            'latitude': lat,
+            'longitude': lon,
+            'data_start_year': int(df['YEAR'].min()),
+            'data_end_year': int(df['YEAR'].max()),
+            'processed_on': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'schema': CUBE_SCHEMA,
+        }
+
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        # Indeks sub-periode dari skema lama tidak boleh dipakai lagi
+        for path in glob.glob(os.path.join(entry_dir, 'period_*.pkl')):
+            os.remove(path)
+        self._write_pickle(df, os.path.join(entry_dir, 'daily.pkl'))
+        self._write_pickle(indices, os.path.join(entry_dir, 'indices.pkl'))
+        tmp_path = os.path.join(entry_dir, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(entry_dir, 'meta.json'))
+
+        self._memory.set(key, (indices, meta))
+        return indices, meta
+
+    def _period_indices(self, key, meta, start, end, columns):
+        """Indeks bergantung periode untuk [start, end]: dari cache, atau dihitung saat pertama diminta."""
+        path = os.path.join(self._entry_dir(key), f"period_{start}_{end}.pkl")
+        memory_key = (key, start, end)
+        cached = self._memory.get(memory_key)
+        if cached is None and os.path.exists(path):
+            cached = pd.read_pickle(path)
+        if cached is None:
+            try:
+                df = pd.read_pickle(os.path.join(self._entry_dir(key), 'daily.pkl'))
+            except OSError:
+                raise ValueError("Data harian stasiun sudah dibersihkan; unggah ulang file stasiun.")
+            df = df[(df['YEAR'] >= start) & (df['YEAR'] <= end)]
+            cached = idxTemp(df, 'tave', 'tmax', 'tmin').join(
+                idxTempSpell(df, 'tave', 'tmax', 'tmin', lat=meta['latitude'])
+            )[PERIOD_DEPENDENT_INDICES]
+            self._write_pickle(cached, path)
+        self._memory.set(memory_key, cached)
+        return cached[columns]
+
+    def get(self, key, start_year=None, end_year=None):
+        """
+        Hasil (indices, metadata) untuk satu periode, setara process_climpact_data.
+        Indeks bebas periode diambil dari potongan hasil periode penuh; indeks
+        PERIOD_DEPENDENT_INDICES dihitung ulang (sekali) untuk sub-periode tersebut.
+        """
+        loaded = self.load(key)
+        if loaded is None:
+            raise ValueError("Hasil stasiun tidak ditemukan di kubus indeks.")
+        full, meta = loaded
+        data_min, data_max = meta['data_start_year'], meta['data_end_year']
+        start, end, manual = resolve_period(data_min, data_max, start_year, end_year)
+
+        if (start, end) == (data_min, data_max):
+            indices = full
+        else:
+            indices = full.loc[(full.index >= start) & (full.index <= end)]
+            if indices.empty:
+                raise ValueError("Tidak ada data dalam periode yang ditentukan.")
+            dependent = [c for c in PERIOD_DEPENDENT_INDICES if c in indices.columns]
+            if dependent:
+                fresh = self._period_indices(key, meta, start, end, dependent)
+                indices = indices.copy()
+                indices[dependent] = fresh.reindex(indices.index)
+
+        metadata = {
+            'station_name': meta['station_name'],
+            'latitude': meta['latitude'],
+            'longitude': meta['longitude'],
+            'base_period_start': start,
+            'base_period_end': end,
+            'processed_on': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'total_years': len(indices),
+            'data_start_year': data_min,
+            'data_end_year': data_max,
+            'used_manual_period': manual,
+        }
+        return indices, metadata
+
+    def get_or_build(self, file_path, start_year=None, end_year=None):
+        """Ambil dari kubus atau hitung periode penuh lebih dulu. Mengembalikan (key, indices, metadata)."""
+        key = hash_file(file_path)
+        if self.load(key) is None:
+            self.build(file_path, key)
+        indices, metadata = self.get(key, start_year, end_year)
+        return key, indices, metadata
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: tidak ada kunci lintas proses, cukup satu proses dev server
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# --- Pembersih Otomatis data/uploads & data/results ---
+# Setiap entri tingkat atas (folder job atau file lama) dianggap satu unit:
+#   1. dihapus jika lebih tua dari TTL,
+#   2. jika total ukuran melebihi kuota, entri tertua dihapus lebih dulu.
+# Entri yang lebih muda dari grace period tidak pernah disentuh (job masih berjalan).
+# Thread hanya berjalan di SATU proses per server: start() memegang kunci file (flock)
+# selama proses hidup, dan status terakhir ditulis ke file agar worker lain dapat membacanya.
+
+
+def _entry_usage(path):
+    """Kembalikan (ukuran total byte, mtime terbaru) untuk file atau folder job."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return 0, 0
+    if not os.path.isdir(path) or os.path.islink(path):
+        return st.st_size, st.st_mtime
+
+    total, newest = 0, st.st_mtime
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                fst = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            total += fst.st_size
+            newest = max(newest, fst.st_mtime)
+    return total, newest
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    if os.name != 'posix':
+        return True  # os.kill(pid, 0) di Windows justru menghentikan proses
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _remove_entry(path):
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+class DataJanitor:
+    """Thread latar belakang yang menjaga folder kerja tetap dalam batas TTL dan kuota."""
+
+    def __init__(self, policies, interval=600, grace_seconds=300, lock_path=None, state_path=None):
+        # policies: {nama: {'path': ..., 'ttl': detik, 'quota': byte}}
+        self.policies = policies
+        self.interval = interval
+        self.grace_seconds = grace_seconds
+        self.lock_path = lock_path
+        self.state_path = state_path
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._lock_file = None
+        self.stats = {
+            'runs': 0,
+            'last_run': None,
+            'reclaimed_bytes': 0,
+            'removed_entries': 0,
+            'roots': {},
+        }
+
+    def sweep_root(self, name, policy, now=None):
+        now = now or time.time()
+        root = policy['path']
+        os.makedirs(root, exist_ok=True)
+
+        entries = []
+        for entry_name in os.listdir(root):
+            path = os.path.join(root, entry_name)
+            size, mtime = _entry_usage(path)
+            entries.append({'path': path, 'size': size, 'mtime': mtime})
+        entries.sort(key=lambda e: e['mtime'])
+
+        reclaimed, removed = 0, 0
+        total = sum(e['size'] for e in entries)
+        ttl = policy.get('ttl')
+        quota = policy.get('quota')
+
+        for entry in entries:
+            age = now - entry['mtime']
+            if age < self.grace_seconds:
+                continue
+            expired = ttl is not None and age > ttl
+            over_quota = quota is not None and total > quota
+            if not (expired or over_quota):
+                continue
+            if _remove_entry(entry['path']):
+                reclaimed += entry['size']
+                removed += 1
+                total -= entry['size']
+
+        return {
+            'path': root,
+            'usage_bytes': total,
+            'quota_bytes': quota,
+            'ttl_seconds': ttl,
+            'entries': len(entries) - removed,
+            'reclaimed_bytes': reclaimed,
+            'removed_entries': removed,
+        }
+
+    def run_once(self):
+        """Jalankan satu putaran pembersihan untuk semua folder yang dikelola."""
+        with self._lock:
+            now = time.time()
+            for name, policy in self.policies.items():
+                result = self.sweep_root(name, policy, now=now)
+                self.stats['roots'][name] = result
+                self.stats['reclaimed_bytes'] += result['reclaimed_bytes']
+                self.stats['removed_entries'] += result['removed_entries']
+            self.stats['runs'] += 1
+            self.stats['last_run'] = now
+            snapshot = self._snapshot()
+            if self._owns_thread():
+                self._write_state(snapshot)
+            return snapshot
+
+    def _owns_thread(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _snapshot(self):
+        return {
+            'running': self._owns_thread(),
+            'pid': os.getpid(),
+            'interval_seconds': self.interval,
+            'runs': self.stats['runs'],
+            'last_run': self.stats['last_run'],
+            'reclaimed_bytes': self.stats['reclaimed_bytes'],
+            'removed_entries': self.stats['removed_entries'],
+            'roots': dict(self.stats['roots']),
+        }
+
+    def _write_state(self, snapshot):
+        if self.state_path is None:
+            return
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            logger.warning("Gagal menulis status janitor ke %s", self.state_path, exc_info=True)
+
+    def status(self):
+        """Status janitor; di worker yang tidak menjalankan thread, dibaca dari file status pemiliknya."""
+        if self._owns_thread() or self.state_path is None:
+            return self._snapshot()
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return self._snapshot()
+        state['running'] = _pid_alive(state.get('pid'))
+        return state
+
+    def _acquire_lock(self):
+        """Kunci eksklusif lintas proses; False jika proses lain sudah menjalankan janitor."""
+        if self.lock_path is None or self._lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+        lock_file = open(self.lock_path, 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+        self._lock_file = lock_file
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Janitor gagal membersihkan folder kerja")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Jalankan thread pembersih jika belum ada proses lain yang menjalankannya."""
+        if self._owns_thread():
+            return True
+        if not self._acquire_lock():
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='data-janitor', daemon=True)
+        self._thread.start()
+        logger.info("Janitor berjalan di proses %d (interval %d s)", os.getpid(), self.interval)
+        return True
+
+    def stop(self):
+        self._stop.set()
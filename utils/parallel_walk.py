@@ -0,0 +1,210 @@
+import os
+import time
+import shutil
+import zipfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# --- Konfigurasi Penelusuran Paralel ---
+# Di share drive jaringan, latensi per file mendominasi; beberapa scandir/open
+# dijalankan bersamaan agar latensi tersebut saling tumpang tindih.
+WALK_MAX_WORKERS = 8
+PREFETCH_WINDOW = 16
+FOLDER_STATS_TTL = 600
+FOLDER_STATS_TIMEOUT = 1.5
+COPY_BUFFER = 1024 * 1024
+ZIP_MIN_TIMESTAMP = 315619200   # 1980-01-02, batas bawah tanggal ZIP
+
+_stats_cache = {}
+_stats_lock = threading.Lock()
+_stats_pending = {}
+_pending_lock = threading.Lock()
+_stats_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='folder-stats')
+
+
+def _scan(path, skip_names):
+    """Satu scandir: kembalikan ([(path file, ukuran)], [subfolder]). Error diabaikan seperti os.walk."""
+    files, dirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name in skip_names:
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif not entry.is_dir():
+                        # symlink ke folder tidak diikuti (sama seperti os.walk)
+                        files.append((entry.path, entry.stat().st_size))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, dirs
+
+
+def walk_files(root, skip_names=(), max_workers=WALK_MAX_WORKERS):
+    """
+    Telusuri pohon folder secara paralel (scandir di thread pool, konkurensi dibatasi
+    max_workers) dan hasilkan (path file, ukuran) begitu tiap folder selesai dibaca.
+    """
+    skip_names = frozenset(skip_names)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='walk') as pool:
+        pending = {pool.submit(_scan, root, skip_names)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, dirs = future.result()
+                for subdir in dirs:
+                    pending.add(pool.submit(_scan, subdir, skip_names))
+                yield from files
+
+
+def _open_with_stat(path):
+    fh = open(path, 'rb')
+    try:
+        return fh, os.fstat(fh.fileno())
+    except OSError:
+        fh.close()
+        raise
+
+
+def prefetch_open(paths, max_workers=WALK_MAX_WORKERS, window=PREFETCH_WINDOW):
+    """
+    Buka file lebih dulu di thread pool (maks. `window` file di depan) dan hasilkan
+    (path, file handle, stat) berurutan. Pemanggil wajib menutup handle.
+    File yang gagal dibuka dilewati.
+    """
+    paths = iter(paths)
+    queue = deque()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch') as pool:
+        try:
+            for path in paths:
+                queue.append((path, pool.submit(_open_with_stat, path)))
+                if len(queue) >= window:
+                    yield from _drain_one(queue)
+            while queue:
+                yield from _drain_one(queue)
+        finally:
+            # Generator dihentikan lebih awal: tutup handle yang sudah terbuka
+            for _, future in queue:
+                try:
+                    future.result()[0].close()
+                except Exception:
+                    pass
+
+
+def _drain_one(queue):
+    path, future = queue.popleft()
+    try:
+        fh, st = future.result()
+    except OSError:
+        return
+    yield path, fh, st
+
+
+def add_tree_to_zip(zf, tree_root, arc_root, skip_names=()):
+    """Tambahkan seluruh isi folder ke ZIP memakai penelusuran paralel + file handle prefetch."""
+    file_paths = (path for path, _ in walk_files(tree_root, skip_names))
+    for path, fh, st in prefetch_open(file_paths):
+        with fh:
+            info = zipfile.ZipInfo(
+                os.path.relpath(path, arc_root),
+                date_time=time.localtime(max(st.st_mtime, ZIP_MIN_TIMESTAMP))[:6]
+            )
+            info.compress_type = zf.compression
+            info.external_attr = (st.st_mode & 0xFFFF) << 16
+            with zf.open(info, 'w', force_zip64=st.st_size > zipfile.ZIP64_LIMIT) as dst:
+                shutil.copyfileobj(fh, dst, COPY_BUFFER)
+
+
+def _cached_stats(path, skip_names):
+    """(entri cache atau None, masih segar?) tanpa menelusuri; entri basi tetap dikembalikan."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, False
+    with _stats_lock:
+        cached = _stats_cache.get((path, frozenset(skip_names)))
+    fresh = bool(cached) and cached['mtime_ns'] == mtime_ns and time.time() - cached['computed'] < FOLDER_STATS_TTL
+    return cached, fresh
+
+
+def _stats_entry(path, skip_names):
+    """Entri cache {'size', 'count', 'computed', 'mtime_ns'}; ditelusuri ulang jika kedaluwarsa."""
+    cached, fresh = _cached_stats(path, skip_names)
+    if fresh:
+        return cached
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    now = time.time()
+    size = count = 0
+    for _, file_size in walk_files(path, skip_names):
+        size += file_size
+        count += 1
+    entry = {'mtime_ns': mtime_ns, 'computed': now, 'size': size, 'count': count}
+    with _stats_lock:
+        _stats_cache[(path, frozenset(skip_names))] = entry
+    return entry
+
+
+def folder_stats(path, skip_names=()):
+    """
+    Ukuran total (byte) dan jumlah file secara rekursif.
+    Di-cache per (path, mtime folder); entri kedaluwarsa setelah FOLDER_STATS_TTL
+    karena perubahan di sub-folder dalam tidak mengubah mtime folder ini.
+    """
+    entry = _stats_entry(path, skip_names)
+    return (entry['size'], entry['count']) if entry else None
+
+
+def _submit_stats(path, skip_names):
+    """Satukan permintaan untuk folder yang sama ke satu penelusuran yang sedang berjalan."""
+    key = (path, frozenset(skip_names))
+    with _pending_lock:
+        future = _stats_pending.get(key)
+        created = future is None
+        if created:
+            future = _stats_pool.submit(_stats_entry, path, skip_names)
+            _stats_pending[key] = future
+    if created:
+        # Di luar lock: callback langsung dipanggil di thread ini jika future sudah selesai
+        future.add_done_callback(lambda f, k=key: _pop_pending(k, f))
+    return future
+
+
+def _pop_pending(key, future):
+    with _pending_lock:
+        if _stats_pending.get(key) is future:
+            del _stats_pending[key]
+
+
+def folder_stats_many(paths, skip_names=(), timeout=FOLDER_STATS_TIMEOUT):
+    """
+    Hitung statistik banyak folder sekaligus dengan batas waktu.
+    Mengembalikan {path: (ukuran, jumlah file, waktu dihitung, segar) atau None}.
+    Statistik basi (TTL lewat atau mtime berubah) langsung dipakai sambil dihitung ulang
+    di latar belakang; hanya folder yang belum punya statistik sama sekali yang ditunggu,
+    paling lama `timeout`. Folder yang belum selesai bernilai None dan tetap dihitung di
+    latar belakang; permintaan berikutnya memakai penelusuran yang sama, bukan memulai baru.
+    """
+    results, futures = {}, {}
+    for path in paths:
+        cached, fresh = _cached_stats(path, skip_names)
+        if cached:
+            results[path] = (cached['size'], cached['count'], cached['computed'], fresh)
+            if not fresh:
+                _submit_stats(path, skip_names)
+        else:
+            futures[path] = _submit_stats(path, skip_names)
+
+    if futures:
+        wait(futures.values(), timeout=timeout)
+    for path, future in futures.items():
+        entry = future.result() if future.done() and not future.exception() else None
+        results[path] = (entry['size'], entry['count'], entry['computed'], True) if entry else None
+    return results
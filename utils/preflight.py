@@ -0,0 +1,203 @@
+import io
+import os
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from .climpact_processor import parse_station_dates
+
+# --- Konfigurasi Pre-flight ---
+# Hanya awal dan akhir file yang dibaca: header + sampel baris pertama untuk
+# kolom/tanggal/koordinat, dan baris terakhir untuk rentang tahun. Browser cukup
+# mengirim potongan ini (Blob.slice), bukan seluruh file.
+PREFLIGHT_HEAD_BYTES = 16 * 1024
+PREFLIGHT_TAIL_BYTES = 4 * 1024
+PREFLIGHT_MAX_WORKERS = 8
+REQUIRED_COLUMNS = ['DATA_TIMESTAMP', 'NAME', 'CURRENT_LATITUDE', 'CURRENT_LONGITUDE', 'YEAR']
+INDEX_COLUMNS = {
+    'tave': 'suhu', 'tmax': 'suhu', 'tmin': 'suhu',
+    'ch': 'curah hujan',
+}
+
+_preflight_pool = ThreadPoolExecutor(max_workers=PREFLIGHT_MAX_WORKERS, thread_name_prefix='preflight')
+
+
+def _read_head_tail(stream):
+    """Baca potongan awal dan akhir file tanpa memuat seluruh isi: (ukuran, head, tail)."""
+    stream.seek(0)
+    head = stream.read(PREFLIGHT_HEAD_BYTES)
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    tail = b''
+    if size > len(head):
+        stream.seek(max(len(head), size - PREFLIGHT_TAIL_BYTES))
+        tail = stream.read()
+    stream.seek(0)
+    return size, head, tail
+
+
+def _sample_lines(size, head, tail):
+    """Pecah potongan awal/akhir menjadi baris utuh; bagian tail yang tumpang tindih dibuang."""
+    head_lines = head.splitlines()
+    if size > len(head) and head_lines:
+        head_lines = head_lines[:-1]          # baris terakhir mungkin terpotong
+
+    tail_lines = []
+    if size > len(head):
+        tail = tail[max(0, len(head) + len(tail) - size):]
+        tail_lines = tail.splitlines()[1:]    # baris pertama mungkin terpotong
+    return head_lines, tail_lines
+
+
+def _parse_lines(header, lines):
+    text = b'\n'.join([header] + lines).decode('utf-8-sig', errors='replace')
+    return pd.read_csv(io.StringIO(text), sep=';', dtype=str, skip_blank_lines=True)
+
+
+def check_station_file(stream, filename, start_year=None, end_year=None):
+    """Validasi cepat satu file upload utuh (hanya awal dan akhirnya yang dibaca)."""
+    try:
+        size, head, tail = _read_head_tail(stream)
+    except OSError as e:
+        return check_station_sample(filename, 0, b'', b'', start_year, end_year, read_error=e)
+    return check_station_sample(filename, size, head, tail, start_year, end_year)
+
+
+def check_station_sample(filename, size, head, tail, start_year=None, end_year=None, read_error=None):
+    """
+    Validasi cepat satu file stasiun dari potongan awal (`head`) dan akhir (`tail`)
+    isinya: kolom wajib, format tanggal, koordinat, dan rentang tahun (termasuk
+    periode manual). Mengembalikan laporan dict.
+    """
+    report = {
+        'filename': filename,
+        'ok': False,
+        'errors': [],
+        'warnings': [],
+        'station_name': None,
+        'latitude': None,
+        'longitude': None,
+        'year_start': None,
+        'year_end': None,
+        'size': 0,
+    }
+    errors, warnings = report['errors'], report['warnings']
+
+    if read_error is not None:
+        errors.append(f"Error membaca file: {read_error}")
+        return report
+    report['size'] = size
+    head_lines, tail_lines = _sample_lines(size, head, tail)
+
+    if not head_lines or not head_lines[0].strip():
+        errors.append("File kosong.")
+        return report
+
+    try:
+        head = _parse_lines(head_lines[0], head_lines[1:])
+        tail = _parse_lines(head_lines[0], tail_lines) if tail_lines else head.iloc[0:0]
+    except Exception as e:
+        errors.append(f"Error membaca file: {e}")
+        return report
+
+    tail.columns = head.columns
+    missing = [col for col in REQUIRED_COLUMNS if col not in head.columns]
+    if missing:
+        errors.append(f"Kolom wajib tidak ditemukan: {', '.join(missing)}.")
+        return report
+    if head.empty:
+        errors.append("File tidak berisi baris data.")
+        return report
+
+    for group in sorted(set(INDEX_COLUMNS.values())):
+        cols = [col for col, g in INDEX_COLUMNS.items() if g == group and col not in head.columns]
+        if cols:
+            warnings.append(f"Kolom {', '.join(cols)} tidak ada: indeks {group} tidak dihitung.")
+
+    sample = pd.concat([head, tail], ignore_index=True)
+
+    # Format tanggal (aturan yang sama dengan load_station_data, tanpa strip spasi)
+    dates = parse_station_dates(sample['DATA_TIMESTAMP'])
+    bad_dates = int(dates.isna().sum())
+    if bad_dates:
+        first_bad = sample.loc[dates.isna(), 'DATA_TIMESTAMP'].iloc[0]
+        errors.append(
+            f"Format tanggal DATA_TIMESTAMP tidak valid pada {bad_dates} baris sampel "
+            f"(contoh: '{first_bad}'). Harus DD/MM/YYYY."
+        )
+
+    # Metadata & koordinat dari baris pertama (sama seperti load_station_data)
+    first_row = head.iloc[0]
+    report['station_name'] = str(first_row['NAME']).strip()
+    try:
+        lat = float(first_row['CURRENT_LATITUDE'])
+        lon = float(first_row['CURRENT_LONGITUDE'])
+    except (TypeError, ValueError):
+        errors.append("Latitude/Longitude bukan angka.")
+    else:
+        report['latitude'], report['longitude'] = lat, lon
+        if not (-90 <= lat <= 90):
+            errors.append("Latitude harus antara -90 dan 90.")
+        if not (-180 <= lon <= 180):
+            errors.append("Longitude harus antara -180 dan 180.")
+
+    # Nilai numerik pada sampel
+    for col in INDEX_COLUMNS:
+        if col in sample.columns:
+            values = sample[col].dropna().str.strip()
+            values = values[values != '']
+            invalid = int(pd.to_numeric(values, errors='coerce').isna().sum())
+            if invalid:
+                errors.append(f"Kolom '{col}' berisi {invalid} nilai non-angka pada sampel.")
+
+    # Rentang tahun: awal dari sampel depan, akhir dari sampel belakang
+    years = pd.to_numeric(sample['YEAR'], errors='coerce')
+    if years.isna().all():
+        errors.append("Kolom YEAR tidak berisi tahun yang valid.")
+    else:
+        head_years = years.iloc[:len(head)].dropna()
+        tail_years = years.iloc[len(head):].dropna()
+        year_start = int(head_years.min()) if not head_years.empty else int(years.min())
+        year_end = int(tail_years.max()) if not tail_years.empty else int(years.max())
+        report['year_start'], report['year_end'] = year_start, year_end
+        if not head_years.empty and not tail_years.empty and head_years.min() > tail_years.max():
+            warnings.append("Data tampaknya tidak terurut berdasarkan tanggal.")
+        _check_period(year_start, year_end, start_year, end_year, errors)
+
+    report['ok'] = not errors
+    return report
+
+
+def _check_period(year_start, year_end, start_year, end_year, errors):
+    """Aturan periode manual yang sama dengan process_climpact_data."""
+    use_start = int(start_year) if start_year not in (None, '') else None
+    use_end = int(end_year) if end_year not in (None, '') else None
+    if use_start is None or use_end is None:
+        return
+    if use_start > use_end:
+        errors.append("Start Year tidak boleh lebih besar dari End Year.")
+    elif use_start < year_start or use_end > year_end:
+        errors.append(
+            f"Periode manual ({use_start}–{use_end}) harus dalam rentang data ({year_start}–{year_end})."
+        )
+
+
+def preflight_files(station_files, start_year=None, end_year=None):
+    """
+    Jalankan check_station_file untuk semua file upload secara bersamaan.
+    Urutan laporan mengikuti urutan file.
+    """
+    futures = [
+        _preflight_pool.submit(
+            check_station_file, file.stream, os.path.basename(file.filename), start_year, end_year
+        )
+        for file in station_files if file.filename
+    ]
+    return [future.result() for future in futures]
+
+
+def preflight_samples(samples, start_year=None, end_year=None):
+    """Seperti preflight_files, untuk potongan yang dikirim browser: [(nama, ukuran, head, tail), ...]."""
+    futures = [
+        _preflight_pool.submit(check_station_sample, filename, size, head, tail, start_year, end_year)
+        for filename, size, head, tail in samples
+    ]
+    return [future.result() for future in futures]
@@ -0,0 +1,310 @@
+import os
+import json
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from .result_exporter import STATION_COLUMNS, to_long_table
+
+# --- Konfigurasi Agregasi Wilayah ---
+AGGREGATION_METHODS = {
+    'mean': 'Rata-rata stasiun di dalam wilayah',
+    'weighted': 'Rata-rata berbobot luas (poligon Thiessen)',
+    'idw': 'Rata-rata inverse distance weighting',
+}
+REGION_NAME_PROPERTIES = ['name', 'NAME', 'NAME_1', 'PROVINSI', 'Propinsi', 'WADMPR', 'region']
+INDEX_GRID_DEGREES = 1.0          # ukuran sel indeks spasial (derajat)
+SAMPLE_GRID_DEGREES = 0.05        # jarak titik sampel luas wilayah (~5 km)
+MAX_SAMPLE_POINTS = 20000         # per wilayah; grid dijarangkan jika lebih
+IDW_POWER = 2
+DISTANCE_CHUNK = 4096
+CONTAINS_CHUNK = 4096             # titik per blok uji point-in-polygon
+CONTAINS_MAX_CELLS = 1 << 20      # batas titik × tepi per blok (~8 MB per array float64)
+REGION_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+_region_pool = ThreadPoolExecutor(max_workers=REGION_MAX_WORKERS, thread_name_prefix='region')
+
+_boundary_cache = {}
+_boundary_lock = threading.Lock()
+
+
+# --- Batas Wilayah (GeoJSON) ---
+def _feature_rings(geometry):
+    """Semua ring (luar & lubang) dari Polygon/MultiPolygon sebagai array (n, 2) lon/lat."""
+    if not geometry:
+        return []
+    if geometry['type'] == 'Polygon':
+        polygons = [geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+        polygons = geometry['coordinates']
+    else:
+        return []
+    return [np.asarray(ring, dtype=float)[:, :2] for polygon in polygons for ring in polygon if len(ring) >= 3]
+
+
+def _region_name(properties, position):
+    for key in REGION_NAME_PROPERTIES:
+        if properties.get(key) not in (None, ''):
+            return str(properties[key])
+    return f"wilayah_{position + 1}"
+
+
+class RegionBoundaries:
+    """
+    Poligon wilayah dari satu file GeoJSON beserta indeks spasial grid:
+    tiap sel INDEX_GRID_DEGREES menyimpan wilayah yang bbox-nya menyentuh sel tersebut,
+    sehingga uji point-in-polygon hanya dijalankan untuk kandidat.
+    """
+
+    def __init__(self, features):
+        self.names, self.edges, self.bboxes = [], [], []
+        for position, feature in enumerate(features):
+            rings = _feature_rings(feature.get('geometry'))
+            if not rings:
+                continue
+            # Tepi semua ring digabung: aturan even-odd menangani lubang & MultiPolygon
+            starts = np.concatenate([ring for ring in rings])
+            ends = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+            self.names.append(_region_name(feature.get('properties') or {}, position))
+            x1, y1 = starts.T
+            x2, y2 = ends.T
+            keep = y1 != y2       # tepi horizontal tidak pernah memotong sinar horizontal
+            self.edges.append((x1[keep], y1[keep], x2[keep], y2[keep],
+                               np.minimum(y1, y2)[keep], np.maximum(y1, y2)[keep]))
+            self.bboxes.append((*starts.min(axis=0), *starts.max(axis=0)))
+        if not self.names:
+            raise ValueError("File batas wilayah tidak berisi Polygon/MultiPolygon.")
+        self.bboxes = np.asarray(self.bboxes)
+        self.grid = {}
+        for region, (x0, y0, x1, y1) in enumerate(self.bboxes):
+            for cx in range(int(np.floor(x0 / INDEX_GRID_DEGREES)), int(np.floor(x1 / INDEX_GRID_DEGREES)) + 1):
+                for cy in range(int(np.floor(y0 / INDEX_GRID_DEGREES)), int(np.floor(y1 / INDEX_GRID_DEGREES)) + 1):
+                    self.grid.setdefault((cx, cy), []).append(region)
+
+    @classmethod
+    def from_file(cls, path):
+        """Baca GeoJSON (di-cache per path & mtime, indeks spasial ikut tersimpan)."""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            raise ValueError("File batas wilayah tidak ditemukan.")
+        with _boundary_lock:
+            cached = _boundary_cache.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Error membaca GeoJSON: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("GeoJSON harus berupa objek FeatureCollection atau Feature.")
+        features = data.get('features', [data] if data.get('type') == 'Feature' else [])
+        if not isinstance(features, list):
+            raise ValueError("Properti 'features' pada GeoJSON harus berupa list.")
+        try:
+            boundaries = cls(features)
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise ValueError(f"Geometri GeoJSON tidak valid: {e}")
+        with _boundary_lock:
+            _boundary_cache[path] = (mtime_ns, boundaries)
+        return boundaries
+
+    def _contains(self, region, lon, lat):
+        """
+        Ray casting vektor: paritas jumlah perpotongan titik × tepi. Titik diurutkan per
+        lintang dan diproses per blok; tiap blok hanya diuji terhadap tepi yang rentang
+        lintangnya beririsan, dan titik × tepi per blok dibatasi CONTAINS_MAX_CELLS.
+        """
+        x1, y1, x2, y2, y_low, y_high = self.edges[region]
+        inside = np.zeros(len(lon), dtype=bool)
+        order = np.argsort(lat, kind='stable')
+        start = 0
+        while start < len(order):
+            step = CONTAINS_CHUNK
+            while True:
+                block = order[start:start + step]
+                py_min, py_max = lat[block[0]], lat[block[-1]]
+                edges = np.flatnonzero((y_low <= py_max) & (y_high > py_min))
+                if step == 1 or len(block) * len(edges) <= CONTAINS_MAX_CELLS:
+                    break
+                step //= 2
+            if len(edges):
+                ex1, ey1, ex2, ey2 = x1[edges], y1[edges], x2[edges], y2[edges]
+                px, py = lon[block, None], lat[block, None]
+                crosses = (ey1 > py) != (ey2 > py)
+                x_cross = ex1 + (py - ey1) * (ex2 - ex1) / (ey2 - ey1)
+                inside[block] = ((crosses & (px < x_cross)).sum(axis=1) % 2) == 1
+            start += len(block)
+        return inside
+
+    def locate(self, lon, lat):
+        """Indeks wilayah untuk setiap titik (-1 jika di luar semua wilayah)."""
+        lon, lat = np.asarray(lon, dtype=float), np.asarray(lat, dtype=float)
+        result = np.full(len(lon), -1)
+        cells = zip(np.floor(lon / INDEX_GRID_DEGREES).astype(int), np.floor(lat / INDEX_GRID_DEGREES).astype(int))
+        candidates = {}
+        for point, cell in enumerate(cells):
+            for region in self.grid.get(cell, ()):
+                candidates.setdefault(region, []).append(point)
+        for region in sorted(candidates):
+            points = np.asarray(candidates[region])
+            points = points[result[points] == -1]
+            if len(points):
+                inside = self._contains(region, lon[points], lat[points])
+                result[points[inside]] = region
+        return result
+
+    def sample_points(self, region):
+        """Titik grid teratur di dalam wilayah untuk bobot luas; pusat bbox jika wilayah sangat kecil."""
+        x0, y0, x1, y1 = self.bboxes[region]
+        step = SAMPLE_GRID_DEGREES
+        while ((x1 - x0) / step + 1) * ((y1 - y0) / step + 1) > MAX_SAMPLE_POINTS * 4:
+            step *= 2
+        gx, gy = np.meshgrid(np.arange(x0 + step / 2, x1, step), np.arange(y0 + step / 2, y1, step))
+        lon, lat = gx.ravel(), gy.ravel()
+        inside = self._contains(region, lon, lat) if len(lon) else np.zeros(0, dtype=bool)
+        if not inside.any():
+            return np.array([(x0 + x1) / 2]), np.array([(y0 + y1) / 2])
+        lon, lat = lon[inside], lat[inside]
+        if len(lon) > MAX_SAMPLE_POINTS:
+            keep = np.linspace(0, len(lon) - 1, MAX_SAMPLE_POINTS).astype(int)
+            lon, lat = lon[keep], lat[keep]
+        return lon, lat
+
+
+def list_boundary_files(boundary_dir):
+    if not os.path.isdir(boundary_dir):
+        return []
+    return sorted(name for name in os.listdir(boundary_dir) if name.lower().endswith(('.geojson', '.json')))
+
+
+# --- Bobot Stasiun per Wilayah ---
+def _distance_km(lon1, lat1, lon2, lat2):
+    """Jarak equirectangular (cukup akurat untuk skala provinsi), matriks titik × stasiun."""
+    mean_lat = np.radians((lat1[:, None] + lat2[None, :]) / 2)
+    dx = np.radians(lon2[None, :] - lon1[:, None]) * np.cos(mean_lat)
+    dy = np.radians(lat2[None, :] - lat1[:, None])
+    return 6371.0 * np.hypot(dx, dy)
+
+
+def _sample_weights(sample_lon, sample_lat, st_lon, st_lat, method):
+    """Rata-rata bobot per stasiun atas titik sampel wilayah (Thiessen: stasiun terdekat, IDW: 1/d^p)."""
+    weights = np.zeros(len(st_lon))
+    for start in range(0, len(sample_lon), DISTANCE_CHUNK):
+        dist = _distance_km(sample_lon[start:start + DISTANCE_CHUNK], sample_lat[start:start + DISTANCE_CHUNK],
+                            st_lon, st_lat)
+        if method == 'weighted':
+            np.add.at(weights, dist.argmin(axis=1), 1.0)
+        else:
+            with np.errstate(divide='ignore'):
+                inv = 1.0 / np.maximum(dist, 1e-6) ** IDW_POWER
+            weights += (inv / inv.sum(axis=1, keepdims=True)).sum(axis=0)
+    return weights / len(sample_lon)
+
+
+def station_weights(stations, boundaries, method='mean'):
+    """
+    Tabel (region, station_name, weight) untuk satu metode.
+    mean: stasiun di dalam wilayah berbobot sama (wilayah tanpa stasiun tidak muncul).
+    weighted / idw: bobot dari titik sampel wilayah terhadap semua stasiun, sehingga
+    wilayah tanpa stasiun tetap terisi dari stasiun terdekat.
+    """
+    if method not in AGGREGATION_METHODS:
+        raise ValueError(f"Metode agregasi '{method}' tidak didukung.")
+    lon = stations['longitude'].to_numpy(dtype=float)
+    lat = stations['latitude'].to_numpy(dtype=float)
+    names = stations['station_name'].to_numpy()
+
+    if method == 'mean':
+        region = boundaries.locate(lon, lat)
+        inside = region >= 0
+        return pd.DataFrame({
+            'region': np.asarray(boundaries.names, dtype=object)[region[inside]],
+            'station_name': names[inside],
+            'weight': 1.0,
+        })
+
+    # Wilayah dihitung paralel: operasi numpy besar melepas GIL
+    def region_weights(region):
+        sample_lon, sample_lat = boundaries.sample_points(region)
+        return _sample_weights(sample_lon, sample_lat, lon, lat, method)
+
+    frames = []
+    all_weights = _region_pool.map(region_weights, range(len(boundaries.names)))
+    for region_name, weights in zip(boundaries.names, all_weights):
+        used = weights > 0
+        frames.append(pd.DataFrame({'region': region_name, 'station_name': names[used], 'weight': weights[used]}))
+    return pd.concat(frames, ignore_index=True)
+
+
+# --- Agregasi ---
+def aggregate_regions(long_table, boundaries, method='mean'):
+    """
+    Rata-rata wilayah untuk semua indeks & tahun sekaligus (satu groupby).
+    Nilai NaN tidak ikut: bobot dinormalisasi ulang atas stasiun yang memiliki nilai.
+    Mengembalikan (tabel wilayah × tahun, tabel penempatan stasiun).
+    """
+    index_cols = [c for c in long_table.columns if c not in STATION_COLUMNS + ['YEAR']]
+    if long_table.empty or not index_cols:
+        raise ValueError("Tabel hasil indeks kosong.")
+
+    stations = long_table.groupby('station_name', sort=False)[['latitude', 'longitude']].first().reset_index()
+    stations = stations.dropna(subset=['latitude', 'longitude'])
+    weights = station_weights(stations, boundaries, method)
+    if weights.empty:
+        raise ValueError("Tidak ada stasiun yang berada di dalam wilayah mana pun.")
+
+    merged = weights.merge(long_table[['station_name', 'YEAR'] + index_cols], on='station_name')
+    values = merged[index_cols].apply(pd.to_numeric, errors='coerce')
+    w = merged['weight'].to_numpy()[:, None]
+    has_value = values.notna().to_numpy()
+    keys = [merged['region'], merged['YEAR']]
+
+    numerator = pd.DataFrame(np.where(has_value, values.to_numpy() * w, 0.0), columns=index_cols).groupby(keys).sum()
+    denominator = pd.DataFrame(np.where(has_value, w, 0.0), columns=index_cols).groupby(keys).sum()
+    table = (numerator / denominator.where(denominator > 0)).round(3)
+    table.insert(0, 'n_stations', merged.groupby(keys)['station_name'].nunique())
+    table.index.names = ['region', 'YEAR']
+
+    assignment = weights.merge(stations, on='station_name')
+    assignment['weight'] = assignment['weight'] / assignment.groupby('region')['weight'].transform('sum')
+    return table, assignment.round({'weight': 4})
+
+
+# --- Sumber Data Hasil ---
+def load_index_table(path):
+    """Baca tabel panjang hasil process_batch (indices_all_stations.csv / .parquet)."""
+    try:
+        if path.lower().endswith('.parquet'):
+            table = pd.read_parquet(path)
+        else:
+            table = pd.read_csv(path)
+    except ImportError:
+        raise ValueError("Membaca Parquet membutuhkan paket 'pyarrow'.")
+    except Exception as e:
+        raise ValueError(f"Error membaca tabel indeks: {e}")
+    missing = [c for c in STATION_COLUMNS + ['YEAR'] if c not in table.columns]
+    if missing:
+        raise ValueError(f"Kolom '{missing[0]}' tidak ditemukan dalam tabel indeks.")
+    return table
+
+
+def load_stored_results(result_dirs):
+    """Gabungkan hasil proses per stasiun yang tersimpan (CSV indeks + JSON metadata per folder job)."""
+    results = []
+    for result_dir in result_dirs:
+        if not os.path.isdir(result_dir):
+            continue
+        for name in os.listdir(result_dir):
+            if not name.endswith('.json'):
+                continue
+            csv_path = os.path.join(result_dir, name[:-5] + '.csv')
+            if not os.path.exists(csv_path):
+                continue
+            with open(os.path.join(result_dir, name)) as f:
+                metadata = json.load(f)
+            results.append((metadata, pd.read_csv(csv_path, index_col='YEAR')))
+    if not results:
+        raise ValueError("Tidak ada hasil tersimpan yang ditemukan.")
+    return to_long_table(results)
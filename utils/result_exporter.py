@@ -0,0 +1,139 @@
+import io
+import importlib.util
+import pandas as pd
+
+# --- Format Ekspor Hasil Indeks ---
+# format -> (ekstensi file, mimetype)
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'netcdf': ('nc', 'application/x-netcdf'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+# format -> kelompok paket opsional; tiap kelompok cukup salah satu yang terpasang
+EXPORT_REQUIREMENTS = {
+    'parquet': [('pyarrow',)],
+    'xlsx': [('openpyxl',)],
+    'netcdf': [('xarray',), ('scipy', 'netCDF4', 'h5netcdf')],
+}
+STATION_COLUMNS = ['station_name', 'latitude', 'longitude']
+CSV_CHUNK_ROWS = 500
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def check_export_support(fmt):
+    """
+    Pastikan paket opsional untuk format ekspor terpasang (tanpa mengimpornya), agar
+    batch gagal sebelum stasiun dihitung, bukan setelahnya.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format ekspor '{fmt}' tidak didukung.")
+    for group in EXPORT_REQUIREMENTS.get(fmt, []):
+        if not any(importlib.util.find_spec(name) is not None for name in group):
+            names = "' atau '".join(group)
+            raise ValueError(f"Format '{fmt}' membutuhkan paket '{names}'.")
+
+
+def has_parquet_support():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def default_batch_format():
+    """Batch memakai Parquet (kolumnar) jika pyarrow tersedia, selain itu satu CSV gabungan."""
+    return 'parquet' if has_parquet_support() else 'csv'
+
+
+def to_long_table(results):
+    """
+    Gabungkan hasil per stasiun [(metadata, result_df), ...] menjadi satu tabel panjang
+    dengan kolom station_name, latitude, longitude, YEAR, lalu kolom indeks.
+    """
+    frames = []
+    for metadata, result_df in results:
+        frame = result_df.reset_index()
+        frame.insert(0, 'longitude', metadata['longitude'])
+        frame.insert(0, 'latitude', metadata['latitude'])
+        frame.insert(0, 'station_name', metadata['station_name'])
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=STATION_COLUMNS + ['YEAR'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _as_long_table(df, metadata):
+    if 'station_name' in df.columns:
+        return df
+    if metadata is None:
+        raise ValueError("Metadata stasiun diperlukan untuk ekspor NetCDF.")
+    return to_long_table([(metadata, df)])
+
+
+def _to_netcdf_bytes(df, metadata):
+    """Susun kubus stasiun × tahun × indeks (satu variabel per indeks) lalu tulis ke NetCDF."""
+    long_df = _as_long_table(df, metadata)
+    coords = long_df.groupby('station_name', sort=False)[['latitude', 'longitude']].first()
+    index_cols = [c for c in long_df.columns if c not in STATION_COLUMNS + ['YEAR']]
+
+    ds = long_df.set_index(['station_name', 'YEAR'])[index_cols].astype('float64').to_xarray()
+    ds = ds.rename({'station_name': 'station', 'YEAR': 'year'})
+    ds = ds.assign_coords(
+        latitude=('station', coords['latitude'].reindex(ds['station'].values).to_numpy(dtype='float64')),
+        longitude=('station', coords['longitude'].reindex(ds['station'].values).to_numpy(dtype='float64')),
+    )
+    ds['station'] = ds['station'].astype(str)
+    ds.attrs['title'] = 'Indeks ekstrem iklim (ClimPACT)'
+    ds.attrs['source'] = 'Climate Change Information System - BMKG'
+    return bytes(ds.to_netcdf())
+
+
+def _to_parquet_bytes(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=df.index.name is not None)
+    return buffer.getvalue()
+
+
+def _to_xlsx_bytes(df, metadata):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='indeks', index=df.index.name is not None)
+        if metadata:
+            pd.Series(metadata, name='nilai').to_frame().to_excel(writer, sheet_name='metadata')
+    return buffer.getvalue()
+
+
+def _iter_csv(df, chunk_rows):
+    write_index = df.index.name is not None
+    yield df.head(0).to_csv(index=write_index).encode('utf-8')
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(header=False, index=write_index).encode('utf-8')
+
+
+def _iter_bytes(payload):
+    for start in range(0, len(payload), STREAM_CHUNK_BYTES):
+        yield payload[start:start + STREAM_CHUNK_BYTES]
+
+
+def iter_export(df, fmt, metadata=None, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Hasilkan isi file ekspor sebagai potongan bytes untuk di-stream ke response.
+    Hanya CSV yang benar-benar ditulis bertahap per potongan baris. Parquet, XLSX dan
+    NetCDF disusun utuh di memori lebih dulu (bukan disk), baru kemudian dikirim per
+    potongan; memori puncaknya tetap sebesar seluruh file.
+    """
+    check_export_support(fmt)
+    if fmt == 'csv':
+        return _iter_csv(df, chunk_rows)
+    if fmt == 'parquet':
+        return _iter_bytes(_to_parquet_bytes(df))
+    if fmt == 'xlsx':
+        return _iter_bytes(_to_xlsx_bytes(df, metadata))
+    return _iter_bytes(_to_netcdf_bytes(df, metadata))
+
+
+def export_filename(stem, fmt):
+    return f"{stem}.{EXPORT_FORMATS[fmt][0]}"
+
+
+def export_mimetype(fmt):
+    return EXPORT_FORMATS[fmt][1]
@@ -0,0 +1,141 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Konfigurasi Thumbnail ---
+# Ukuran sisi terpanjang (piksel) untuk tiap varian turunan gambar
+THUMB_SIZES = {
+    'thumb': 320,
+    'medium': 1280,
+}
+THUMB_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.tif', '.tiff')
+
+CACHE_MAX_BYTES = 512 * 1024 * 1024   # batas total ukuran cache (512 MB)
+CACHE_MAX_WORKERS = 4
+
+_executor = ThreadPoolExecutor(max_workers=CACHE_MAX_WORKERS, thread_name_prefix='thumb')
+_pending = {}
+_pending_lock = threading.Lock()
+_evict_lock = threading.Lock()
+
+
+def is_image(filename):
+    return filename.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def _cache_key(source_path, size, fmt, mtime_ns):
+    """Kunci cache: path sumber + ukuran + format + mtime (berubah jika file diganti)."""
+    raw = f"{os.path.abspath(source_path)}|{size}|{fmt}|{mtime_ns}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _render(source_path, target_path, size, fmt):
+    """Buat turunan gambar (dijalankan di thread pool)."""
+    from PIL import Image
+
+    pil_format = THUMB_FORMATS[fmt][0]
+    max_side = THUMB_SIZES[size]
+
+    with Image.open(source_path) as img:
+        img.draft('RGB', (max_side, max_side))
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        if pil_format == 'JPEG':
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img = img.convert('RGBA')
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.split()[-1])
+                img = background
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+        elif img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+
+        # Tulis ke file sementara lalu rename agar pembaca tidak melihat file setengah jadi
+        tmp_path = f"{target_path}.{threading.get_ident()}.tmp"
+        if pil_format == 'WEBP':
+            img.save(tmp_path, pil_format, quality=80, method=4)
+        else:
+            img.save(tmp_path, pil_format, quality=82, optimize=True, progressive=True)
+        os.replace(tmp_path, target_path)
+
+    evict_cache(os.path.dirname(target_path))
+    return target_path
+
+
+def evict_cache(cache_dir, max_bytes=CACHE_MAX_BYTES):
+    """Hapus file cache paling lama diakses sampai total ukuran di bawah batas."""
+    if not _evict_lock.acquire(blocking=False):
+        return 0  # eviksi lain sedang berjalan
+
+    reclaimed = 0
+    try:
+        entries = []
+        total = 0
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith('.tmp'):
+                    continue
+                st = entry.stat()
+                entries.append((max(st.st_atime, st.st_mtime), st.st_size, entry.path))
+                total += st.st_size
+
+        if total <= max_bytes:
+            return 0
+
+        entries.sort()
+        for _, fsize, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= fsize
+                reclaimed += fsize
+            except OSError:
+                continue
+    finally:
+        _evict_lock.release()
+    return reclaimed
+
+
+def get_thumbnail(source_path, cache_dir, size='thumb', fmt='webp'):
+    """
+    Kembalikan (path file turunan, mimetype) untuk gambar sumber.
+    Turunan dibuat saat diminta pertama kali di thread pool, lalu disimpan di cache disk.
+    """
+    if size not in THUMB_SIZES:
+        raise ValueError(f"Ukuran thumbnail '{size}' tidak dikenal.")
+    if fmt not in THUMB_FORMATS:
+        raise ValueError(f"Format thumbnail '{fmt}' tidak didukung.")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    mtime_ns = os.stat(source_path).st_mtime_ns
+    key = _cache_key(source_path, size, fmt, mtime_ns)
+    target_path = os.path.join(cache_dir, f"{key}.{fmt}")
+    mimetype = THUMB_FORMATS[fmt][1]
+
+    if os.path.exists(target_path):
+        return target_path, mimetype
+
+    # Satukan permintaan paralel untuk gambar yang sama ke satu pekerjaan
+    with _pending_lock:
+        future = _pending.get(key)
+        created = future is None
+        if created:
+            future = _executor.submit(_render, source_path, target_path, size, fmt)
+            _pending[key] = future
+    if created:
+        # Di luar lock: callback langsung dipanggil di thread ini jika future sudah selesai
+        future.add_done_callback(lambda f, k=key: _pop_pending(k, f))
+
+    return future.result(), mimetype
+
+
+def _pop_pending(key, future):
+    with _pending_lock:
+        if _pending.get(key) is future:
+            del _pending[key]